@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api'
+    verbose_name = 'API'
+
+    def ready(self):
+        from . import batch, changes
+
+        batch.install()
+        changes.install()
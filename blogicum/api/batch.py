@@ -0,0 +1,93 @@
+"""
+Кэш постов для пакетного запроса /api/posts/batch/.
+
+В кэше лежат все поля поста вместе с признаками видимости, поэтому
+одна запись годится и автору, и остальным. Запись удаляется при
+изменении или удалении поста и при сохранении его комментария.
+Удаление комментария, публикация категории и местоположения
+подхватываются по истечении API_CACHE_MAX_AGE: обработчик удаления
+комментариев лишил бы каскадное удаление поста быстрого пути и
+заставил бы загружать все его комментарии.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from blog.utils import get_post_queryset
+
+from .serializers import POST_FIELDS, serialize
+
+KEY_PREFIX = "api.post."
+
+
+def post_key(pk):
+    return f"{KEY_PREFIX}{pk}"
+
+
+def make_entry(post):
+    return {
+        "author_id": post.author_id,
+        "published": post.is_published and post.category is not None
+        and post.category.is_published,
+        "pub_date": post.pub_date,
+        "data": serialize(post, POST_FIELDS, POST_FIELDS),
+    }
+
+
+def is_visible(entry, user):
+    """Те же правила, что у PostDetailView: автору виден любой свой пост."""
+    if entry["author_id"] == user.id:
+        return True
+    return entry["published"] and entry["pub_date"] <= timezone.now()
+
+
+def get_entries(ids):
+    """
+    Записи постов: сначала из кэша, недостающие — одним запросом.
+
+    Отсутствующие в базе ключи тоже кэшируются, как None, чтобы
+    повторные запросы с ними не доходили до базы.
+
+    Возвращает:
+        dict: Первичный ключ -> запись make_entry или None
+    """
+    cached = cache.get_many([post_key(pk) for pk in ids])
+    entries = {
+        pk: cached[post_key(pk)] for pk in ids if post_key(pk) in cached
+    }
+    missing = [pk for pk in ids if pk not in entries]
+    if missing:
+        fetched = dict.fromkeys(missing)
+        fetched.update(
+            (post.pk, make_entry(post))
+            for post in get_post_queryset(
+                annotate_comments=True
+            ).filter(pk__in=missing)
+        )
+        cache.set_many(
+            {post_key(pk): entry for pk, entry in fetched.items()},
+            settings.API_CACHE_MAX_AGE,
+        )
+        entries.update(fetched)
+    return entries
+
+
+def _forget_post(sender, instance, **kwargs):
+    cache.delete(post_key(instance.pk))
+
+
+def _forget_comment_post(sender, instance, **kwargs):
+    cache.delete(post_key(instance.post_id))
+
+
+def install():
+    for signal in (post_save, post_delete):
+        signal.connect(
+            _forget_post, sender=Post, dispatch_uid="api.batch.post"
+        )
+    post_save.connect(
+        _forget_comment_post, sender=Comment,
+        dispatch_uid="api.batch.comment",
+    )
@@ -0,0 +1,283 @@
+"""
+Журнал изменений для /api/changes/.
+
+Обработчики сигналов моделей блога дописывают в Change состояние
+объекта таким, каким его видят клиенты API, а читающая сторона
+обращается только к журналу. Видимость поста зависит от категории и
+местоположения, поэтому их изменения переписывают и посты; пост,
+ставший видимым, переписывает свои комментарии. Комментарии скрытого
+или удалённого поста отдельных надгробий не получают: клиент удаляет
+их вместе с постом.
+
+Мимо журнала проходят изменения без сигналов (QuerySet.update,
+bulk_create, например generate_data) — после них нужна команда
+log_snapshot — и смена имени пользователя. Удаление комментария
+пишется из Comment.delete(): слушатель post_delete запретил бы
+быстрое каскадное удаление комментариев вместе с постом, поэтому
+QuerySet.delete() комментариев и удаление их автора журнал не видят.
+
+Запись получает available_at до фиксации транзакции, поэтому
+API_SYNC_DELAY должна превышать самую долгую транзакцию, пишущую
+в журнал (например, сохранение в админке категории со всеми её
+постами). Иначе запись может оказаться позади выданного курсора.
+"""
+from itertools import islice
+
+import orjson
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post, comment_deleted
+from blog.utils import get_post_queryset
+
+from .models import (
+    ACTION_DELETE, ACTION_UPSERT, TYPE_CATEGORY, TYPE_COMMENT, TYPE_LOCATION,
+    TYPE_POST, Change
+)
+from .serializers import (
+    CATEGORY_FIELDS, COMMENT_FIELDS, LOCATION_FIELDS, POST_FIELDS, serialize
+)
+from .utils import dumps
+
+# Счётчик комментариев меняется с каждым комментарием; клиенты
+# синхронизации считают комментарии сами
+POST_SYNC_FIELDS = [name for name in POST_FIELDS if name != "comment_count"]
+BATCH_SIZE = 500
+
+
+def snapshot(obj, fields, names):
+    """Поля объекта в том виде, в каком их отдаёт API."""
+    return orjson.loads(dumps(serialize(obj, fields, names)))
+
+
+def last_change(type_, object_id):
+    return Change.objects.filter(
+        type=type_, object_id=object_id
+    ).order_by("-pk").first()
+
+
+def last_changes(type_, ids):
+    """Последние записи объектов одним запросом: object_id -> Change."""
+    latest = Change.objects.filter(
+        type=type_, object_id__in=ids
+    ).values("object_id").annotate(last=Max("pk")).values("last")
+    return {
+        change.object_id: change
+        for change in Change.objects.filter(pk__in=latest)
+    }
+
+
+def is_upsert(change):
+    return change is not None and change.action == ACTION_UPSERT
+
+
+def build(type_, object_id, action, data=None, available_at=None):
+    return Change(
+        type=type_,
+        object_id=object_id,
+        action=action,
+        data=data,
+        available_at=available_at or timezone.now(),
+    )
+
+
+def append(*args, **kwargs):
+    change = build(*args, **kwargs)
+    change.save()
+    return change
+
+
+def log_reference(type_, obj, fields, affects):
+    """
+    Пишет состояние категории или местоположения.
+
+    Аргументы:
+        affects: Поля, которые входят в данные постов
+
+    Возвращает:
+        bool: Нужно ли переписать посты объекта
+    """
+    last = last_change(type_, obj.pk)
+    if not obj.is_published:
+        if is_upsert(last):
+            append(type_, obj.pk, ACTION_DELETE)
+            return True
+        return False
+    data = snapshot(obj, fields, fields)
+    if is_upsert(last) and last.data == data:
+        return False
+    append(type_, obj.pk, ACTION_UPSERT, data)
+    return not is_upsert(last) or any(
+        last.data.get(name) != data[name] for name in affects
+    )
+
+
+def post_changes(post, last, now):
+    """
+    Несохранённые записи журнала для текущего состояния поста.
+
+    Отложенный пост становится доступен клиентам в pub_date, а до того
+    скрывается надгробием, если был виден.
+    """
+    category = post.category
+    if not (post.is_published and category and category.is_published):
+        if is_upsert(last):
+            return [build(TYPE_POST, post.pk, ACTION_DELETE, None, now)]
+        return []
+    data = snapshot(post, POST_FIELDS, POST_SYNC_FIELDS)
+    if is_upsert(last) and last.data == data:
+        return []
+    changes = []
+    if post.pub_date > now and is_upsert(last):
+        changes.append(build(TYPE_POST, post.pk, ACTION_DELETE, None, now))
+    changes.append(build(
+        TYPE_POST, post.pk, ACTION_UPSERT, data, max(now, post.pub_date)
+    ))
+    return changes
+
+
+def log_posts(posts, created=False):
+    """
+    Пишет состояние постов: один запрос за прошлыми записями и одна
+    вставка на всю пачку.
+
+    Автор, категория и местоположение постов должны быть загружены
+    заранее, иначе каждое обращение к ним — отдельный запрос.
+    Пост, ставший видимым, переписывает свои комментарии.
+    """
+    lasts = last_changes(TYPE_POST, [post.pk for post in posts])
+    now = timezone.now()
+    changes = []
+    revealed = {}
+    for post in posts:
+        last = lasts.get(post.pk)
+        new = post_changes(post, last, now)
+        changes.extend(new)
+        if new and new[-1].action == ACTION_UPSERT and not (
+            created or is_upsert(last)
+        ):
+            revealed[post.pk] = new[-1].available_at
+    Change.objects.bulk_create(changes)
+    if revealed:
+        log_post_comments(revealed)
+
+
+def log_post(post, created=False):
+    log_posts([post], created)
+
+
+def log_post_comments(revealed):
+    """
+    Пишет комментарии постов, ставших видимыми.
+
+    Аргументы:
+        revealed: Словарь id поста -> момент, с которого он доступен
+    """
+    comments = Comment.objects.filter(
+        post_id__in=revealed
+    ).select_related("author")
+    Change.objects.bulk_create(
+        (
+            build(
+                TYPE_COMMENT, comment.pk, ACTION_UPSERT,
+                snapshot(comment, COMMENT_FIELDS, COMMENT_FIELDS),
+                revealed[comment.post_id],
+            )
+            for comment in comments.iterator(chunk_size=BATCH_SIZE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def log_comment(comment):
+    """Пишет комментарий, если его пост виден или станет видимым."""
+    post_change = last_change(TYPE_POST, comment.post_id)
+    if not is_upsert(post_change):
+        return
+    append(
+        TYPE_COMMENT, comment.pk, ACTION_UPSERT,
+        snapshot(comment, COMMENT_FIELDS, COMMENT_FIELDS),
+        max(timezone.now(), post_change.available_at),
+    )
+
+
+def log_deletion(type_, object_id):
+    if is_upsert(last_change(type_, object_id)):
+        append(type_, object_id, ACTION_DELETE)
+
+
+def relog_posts(ids):
+    """Переписывает посты с первичными ключами `ids` пачками."""
+    posts = get_post_queryset().filter(pk__in=ids).iterator(
+        chunk_size=BATCH_SIZE
+    )
+    while batch := list(islice(posts, BATCH_SIZE)):
+        log_posts(batch)
+
+
+def _post_saved(sender, instance, created, raw, **kwargs):
+    # Форма уже подставила в пост объекты автора и категории;
+    # незагруженные связи подгрузятся при обращении
+    if not raw:
+        log_post(instance, created)
+
+
+def _comment_saved(sender, instance, raw, **kwargs):
+    if not raw:
+        log_comment(instance)
+
+
+def _category_saved(sender, instance, raw, **kwargs):
+    if not raw and log_reference(
+        TYPE_CATEGORY, instance, CATEGORY_FIELDS, ("slug",)
+    ):
+        relog_posts(instance.posts.values_list("pk", flat=True))
+
+
+def _location_saved(sender, instance, raw, **kwargs):
+    if not raw and log_reference(
+        TYPE_LOCATION, instance, LOCATION_FIELDS, ("name",)
+    ):
+        relog_posts(instance.posts.values_list("pk", flat=True))
+
+
+def _post_deleted(sender, instance, **kwargs):
+    log_deletion(TYPE_POST, instance.pk)
+
+
+def _comment_deleted(sender, pk, **kwargs):
+    log_deletion(TYPE_COMMENT, pk)
+
+
+def _reference_deleting(sender, instance, **kwargs):
+    # После удаления у постов будет NULL вместо ссылки: запоминаем их
+    instance.sync_post_ids = list(
+        instance.posts.values_list("pk", flat=True)
+    )
+
+
+def _reference_deleted(sender, instance, **kwargs):
+    type_ = TYPE_CATEGORY if sender is Category else TYPE_LOCATION
+    log_deletion(type_, instance.pk)
+    relog_posts(instance.sync_post_ids)
+
+
+def install():
+    handlers = (
+        (post_save, Post, _post_saved),
+        (post_save, Comment, _comment_saved),
+        (post_save, Category, _category_saved),
+        (post_save, Location, _location_saved),
+        (post_delete, Post, _post_deleted),
+        (comment_deleted, Comment, _comment_deleted),
+        (pre_delete, Category, _reference_deleting),
+        (pre_delete, Location, _reference_deleting),
+        (post_delete, Category, _reference_deleted),
+        (post_delete, Location, _reference_deleted),
+    )
+    for signal, model, handler in handlers:
+        signal.connect(
+            handler, sender=model,
+            dispatch_uid=f"api.changes.{handler.__name__}.{model.__name__}",
+        )
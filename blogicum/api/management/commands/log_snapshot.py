@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from api.changes import (
+    log_comment, log_reference, relog_posts, CATEGORY_FIELDS, LOCATION_FIELDS
+)
+from api.models import TYPE_CATEGORY, TYPE_COMMENT, TYPE_LOCATION, Change
+from blog.models import Category, Comment, Location, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Дописывает в журнал изменений текущее состояние категорий,"
+        " местоположений, постов и комментариев, которых в журнале"
+        " нет или которые в нём устарели. Нужна для первого заполнения"
+        " и после массовых операций в обход сигналов (generate_data)."
+    )
+
+    def handle(self, *args, **options):
+        before = Change.objects.count()
+        for category in Category.objects.iterator():
+            log_reference(TYPE_CATEGORY, category, CATEGORY_FIELDS, ())
+        for location in Location.objects.iterator():
+            log_reference(TYPE_LOCATION, location, LOCATION_FIELDS, ())
+        relog_posts(Post.objects.values("pk"))
+        comments = Comment.objects.select_related("author").exclude(
+            Exists(Change.objects.filter(
+                type=TYPE_COMMENT, object_id=OuterRef("pk")
+            ))
+        )
+        for comment in comments.iterator():
+            log_comment(comment)
+        self.stdout.write(self.style.SUCCESS(
+            f"Записей добавлено: {Change.objects.count() - before}"
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:50
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Записано')),
+                ('available_at', models.DateTimeField(help_text='Для отложенных публикаций — дата публикации.', verbose_name='Доступно с')),
+                ('type', models.CharField(choices=[('category', 'Категория'), ('location', 'Местоположение'), ('post', 'Публикация'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип объекта')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID объекта')),
+                ('action', models.CharField(choices=[('upsert', 'Создан или изменён'), ('delete', 'Удалён или скрыт')], max_length=10, verbose_name='Действие')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Поля объекта, как в API; пусто у надгробий.', null=True, verbose_name='Состояние')),
+            ],
+            options={
+                'verbose_name': 'изменение',
+                'verbose_name_plural': 'Журнал изменений',
+                'indexes': [models.Index(fields=['available_at'], name='change_available_idx'), models.Index(fields=['type', 'object_id'], name='change_object_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+TYPE_CATEGORY = "category"
+TYPE_LOCATION = "location"
+TYPE_POST = "post"
+TYPE_COMMENT = "comment"
+ACTION_UPSERT = "upsert"
+ACTION_DELETE = "delete"
+
+
+class Change(models.Model):
+    """
+    Запись журнала изменений для синхронизации клиентов.
+
+    Журнал только дополняется: новое состояние объекта — новая запись.
+    Скрытие с публикации и удаление пишутся одинаково, надгробием.
+    """
+
+    TYPE_CHOICES = (
+        (TYPE_CATEGORY, "Категория"),
+        (TYPE_LOCATION, "Местоположение"),
+        (TYPE_POST, "Публикация"),
+        (TYPE_COMMENT, "Комментарий"),
+    )
+    ACTION_CHOICES = (
+        (ACTION_UPSERT, "Создан или изменён"),
+        (ACTION_DELETE, "Удалён или скрыт"),
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Записано"
+    )
+    available_at = models.DateTimeField(
+        verbose_name="Доступно с",
+        help_text="Для отложенных публикаций — дата публикации."
+    )
+    type = models.CharField(
+        max_length=10,
+        choices=TYPE_CHOICES,
+        verbose_name="Тип объекта"
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name="ID объекта")
+    action = models.CharField(
+        max_length=10,
+        choices=ACTION_CHOICES,
+        verbose_name="Действие"
+    )
+    data = models.JSONField(
+        null=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Состояние",
+        help_text="Поля объекта, как в API; пусто у надгробий."
+    )
+
+    class Meta:
+        verbose_name = "изменение"
+        verbose_name_plural = "Журнал изменений"
+        indexes = (
+            # Выдача по курсору (available_at, id)
+            models.Index(
+                fields=("available_at",), name="change_available_idx"
+            ),
+            # Последняя запись объекта
+            models.Index(
+                fields=("type", "object_id"), name="change_object_idx"
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.type} {self.object_id}: {self.action}"
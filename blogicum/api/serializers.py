@@ -0,0 +1,47 @@
+"""Поля моделей блога в ответах API: имя поля -> функция от объекта."""
+
+
+def _post_location(post):
+    location = post.location
+    if location is None or not location.is_published:
+        return None
+    return location.name
+
+
+POST_FIELDS = {
+    "id": lambda post: post.pk,
+    "title": lambda post: post.title,
+    "text": lambda post: post.text,
+    "pub_date": lambda post: post.pub_date,
+    "author": lambda post: post.author.username,
+    "category": lambda post: post.category and post.category.slug,
+    "location": _post_location,
+    "image": lambda post: post.image.url if post.image else None,
+    "comment_count": lambda post: post.comment_count,
+}
+
+CATEGORY_FIELDS = {
+    "id": lambda category: category.pk,
+    "slug": lambda category: category.slug,
+    "title": lambda category: category.title,
+    "description": lambda category: category.description,
+    "created_at": lambda category: category.created_at,
+}
+
+LOCATION_FIELDS = {
+    "id": lambda location: location.pk,
+    "name": lambda location: location.name,
+    "created_at": lambda location: location.created_at,
+}
+
+COMMENT_FIELDS = {
+    "id": lambda comment: comment.pk,
+    "post": lambda comment: comment.post_id,
+    "author": lambda comment: comment.author.username,
+    "text": lambda comment: comment.text,
+    "created_at": lambda comment: comment.created_at,
+}
+
+
+def serialize(obj, fields, names):
+    return {name: fields[name](obj) for name in names}
@@ -0,0 +1,135 @@
+import hashlib
+from functools import partial, wraps
+from http import HTTPStatus
+
+import orjson
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from core.utils import etag_matches
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+class ApiError(Exception):
+    """Неверные параметры запроса: клиент получает 400 с описанием."""
+
+
+def dumps(data):
+    """JSON в байтах; время в UTC с суффиксом Z и микросекундами."""
+    return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+
+
+def json_response(request, data, status=HTTPStatus.OK):
+    """
+    JSON-ответ с ETag по содержимому.
+
+    Если ETag совпадает с If-None-Match, тело не отправляется.
+    """
+    body = dumps(data)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    if status == HTTPStatus.OK and etag_matches(
+        request.META.get("HTTP_IF_NONE_MATCH"), etag
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            body, content_type=JSON_CONTENT_TYPE, status=status
+        )
+    response.headers["ETag"] = etag
+    return response
+
+
+def api_view(view=None, public=True):
+    """
+    Превращает функцию, возвращающую данные, в представление API.
+
+    Аргументы:
+        public: Ответ одинаков для всех пользователей и его можно
+            кэшировать прокси; иначе он помечается как private
+    """
+    if view is None:
+        return partial(api_view, public=public)
+
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response(
+                request, {"error": str(error)}, HTTPStatus.BAD_REQUEST
+            )
+        except Http404:
+            return json_response(
+                request, {"error": "Не найдено."}, HTTPStatus.NOT_FOUND
+            )
+        response = json_response(request, data)
+        if public:
+            patch_cache_control(
+                response, public=True, max_age=settings.API_CACHE_MAX_AGE
+            )
+        else:
+            patch_cache_control(response, private=True)
+        return response
+
+    return wrapper
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get("limit", settings.API_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= settings.API_MAX_PAGE_SIZE:
+        raise ApiError(
+            f"limit должен быть от 1 до {settings.API_MAX_PAGE_SIZE}."
+        )
+    return limit
+
+
+def get_fields(request, fields):
+    """
+    Поля из параметра ?fields=a,b; по умолчанию — все.
+
+    Аргументы:
+        fields: Словарь доступных полей сериализатора
+    """
+    names = request.GET.get("fields")
+    if not names:
+        return list(fields)
+    names = names.split(",")
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(
+            "Неизвестные поля: " + ", ".join(unknown)
+            + ". Доступны: " + ", ".join(fields) + "."
+        )
+    return names
+
+
+def get_ids(request):
+    """Первичные ключи из ?ids=1,2,3 без повторов, в исходном порядке."""
+    try:
+        ids = [int(pk) for pk in request.GET.get("ids", "").split(",")]
+    except ValueError:
+        ids = None
+    if ids is None or min(ids) < 0:
+        raise ApiError("ids должен быть списком чисел через запятую.")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.API_BATCH_MAX_IDS:
+        raise ApiError(
+            f"Не больше {settings.API_BATCH_MAX_IDS} ids за запрос."
+        )
+    return ids
+
+
+def next_url(request, cursor):
+    """Адрес следующей страницы с теми же параметрами или None."""
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query["after"] = cursor
+    return f"{request.path}?{query.urlencode()}"
@@ -0,0 +1,182 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location
+from blog.utils import (
+    decode_cursor, encode_cursor, get_keyset_page, get_post_queryset
+)
+from core.budgets import memory_budget, query_budget
+
+from .batch import get_entries, is_visible
+from .models import Change
+from .serializers import (
+    CATEGORY_FIELDS, COMMENT_FIELDS, LOCATION_FIELDS, POST_FIELDS, serialize
+)
+from .utils import (
+    ApiError, api_view, get_fields, get_ids, get_limit, next_url
+)
+
+
+def get_api_post_queryset(names):
+    """
+    Опубликованные посты; текст и счётчик комментариев читаются,
+    только если клиент запросил эти поля.
+    """
+    posts = get_post_queryset(
+        filter_published=True,
+        annotate_comments="comment_count" in names
+    )
+    if "text" not in names:
+        posts = posts.defer("text")
+    return posts
+
+
+def check_cursor(request):
+    cursor = request.GET.get("after")
+    if cursor is not None and decode_cursor(cursor) is None:
+        raise ApiError("Неверный курсор after.")
+    return cursor
+
+
+def paginate(request, queryset, field, fields, names, descending=False):
+    """Страница объектов после курсора ?after= по паре (field, pk)."""
+    items, cursor = get_keyset_page(
+        queryset, field, check_cursor(request), get_limit(request),
+        descending
+    )
+    return {
+        "results": [serialize(item, fields, names) for item in items],
+        "next": next_url(request, cursor),
+    }
+
+
+@query_budget(1)
+@memory_budget(2 * 1024 * 1024)
+@api_view
+def post_list(request):
+    """Опубликованные посты от новых к старым; фильтры category, author."""
+    names = get_fields(request, POST_FIELDS)
+    posts = get_api_post_queryset(names)
+    if "category" in request.GET:
+        posts = posts.filter(category__slug=request.GET["category"])
+    if "author" in request.GET:
+        posts = posts.filter(author__username=request.GET["author"])
+    return paginate(
+        request, posts, "pub_date", POST_FIELDS, names, descending=True
+    )
+
+
+@query_budget(1)
+@api_view
+def post_detail(request, post_id):
+    names = get_fields(request, POST_FIELDS)
+    post = get_api_post_queryset(names).filter(pk=post_id).first()
+    if post is None:
+        raise Http404
+    return serialize(post, POST_FIELDS, names)
+
+
+@query_budget(3)
+@memory_budget(2 * 1024 * 1024)
+@api_view(public=False)
+def post_batch(request):
+    """
+    Посты по списку ?ids= за один запрос к базе.
+
+    Недостающие в кэше посты читаются одним запросом. Автор видит свои
+    неопубликованные посты, как на странице поста; невидимые и
+    несуществующие ключи перечисляются в missing.
+    """
+    names = get_fields(request, POST_FIELDS)
+    ids = get_ids(request)
+    entries = get_entries(ids)
+    results = []
+    missing = []
+    for pk in ids:
+        entry = entries.get(pk)
+        if entry is not None and is_visible(entry, request.user):
+            results.append({name: entry["data"][name] for name in names})
+        else:
+            missing.append(pk)
+    return {"results": results, "missing": missing}
+
+
+@query_budget(2)
+@memory_budget(2 * 1024 * 1024)
+@api_view
+def comment_list(request, post_id):
+    """Комментарии опубликованного поста в порядке добавления."""
+    names = get_fields(request, COMMENT_FIELDS)
+    if not get_post_queryset(filter_published=True).filter(
+        pk=post_id
+    ).exists():
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        "author"
+    )
+    return paginate(request, comments, "created_at", COMMENT_FIELDS, names)
+
+
+@query_budget(1)
+@api_view
+def category_list(request):
+    names = get_fields(request, CATEGORY_FIELDS)
+    return paginate(
+        request, Category.objects.filter(is_published=True),
+        "created_at", CATEGORY_FIELDS, names,
+    )
+
+
+@query_budget(1)
+@api_view
+def location_list(request):
+    names = get_fields(request, LOCATION_FIELDS)
+    return paginate(
+        request, Location.objects.filter(is_published=True),
+        "created_at", LOCATION_FIELDS, names,
+    )
+
+
+@query_budget(1)
+@memory_budget(2 * 1024 * 1024)
+@api_view
+def change_list(request):
+    """
+    Изменения после курсора ?after= из журнала Change.
+
+    Запись, после которой объект менялся ещё раз, пропускается: клиенту
+    нужно только последнее состояние. Курсор cursor ответа сохраняется
+    клиентом для следующей синхронизации, даже если next пуст.
+    """
+    cursor = check_cursor(request)
+    horizon = timezone.now() - timedelta(seconds=settings.API_SYNC_DELAY)
+    changes = Change.objects.filter(available_at__lte=horizon).exclude(
+        Exists(Change.objects.filter(
+            type=OuterRef("type"),
+            object_id=OuterRef("object_id"),
+            pk__gt=OuterRef("pk"),
+            available_at__lte=horizon,
+        ))
+    )
+    items, next_cursor = get_keyset_page(
+        changes, "available_at", cursor, get_limit(request)
+    )
+    if items:
+        cursor = encode_cursor(items[-1].available_at, items[-1].pk)
+    return {
+        "results": [
+            {
+                "type": change.type,
+                "id": change.object_id,
+                "action": change.action,
+                "data": change.data,
+            }
+            for change in items
+        ],
+        "next": next_url(request, next_cursor),
+        "cursor": cursor,
+    }
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только внутри процесса
+    fcntl = None
+
+# Параллельные запросы одного варианта ждут одну операцию ресайза:
+# потоки — на threading.Lock, процессы — на flock. Блокировки разбиты
+# на фиксированное число полос, чтобы не копиться вместе с вариантами.
+LOCK_STRIPES = 64
+_variant_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+# Учтённый размер кэша вариантов в байтах: полный обход каталога
+# нужен, только когда он превышает лимит
+SIZE_FILE = ".size"
+
+
+def read_image_metadata(file, size):
+    """
+    Читает размеры и формат изображения без декодирования пикселей.
+
+    Аргументы:
+        file: Файлоподобный объект или путь к файлу
+        size: Размер файла в байтах
+
+    Возвращает:
+        dict: Ширина, высота, размер и формат изображения,
+            пустой словарь если файл не является изображением
+    """
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            image_format = image.format or ""
+    except (OSError, UnidentifiedImageError):
+        return {}
+    finally:
+        if hasattr(file, "seek"):
+            file.seek(0)
+    return {
+        "width": width,
+        "height": height,
+        "size": size,
+        "format": image_format.lower(),
+    }
+
+
+def variant_name(image_name, preset):
+    """Путь варианта изображения относительно MEDIA_ROOT."""
+    digest = hashlib.sha1(image_name.encode()).hexdigest()[:20]
+    extension = settings.IMAGE_PRESETS[preset]["format"]
+    return f"{settings.IMAGE_CACHE_DIR}/{preset}/{digest}.{extension}"
+
+
+def resize_image(source, destination, preset):
+    """Вписывает изображение в размеры пресета и сохраняет его."""
+    options = settings.IMAGE_PRESETS[preset]
+    image_format = options["format"].upper()
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(options["size"], Image.Resampling.LANCZOS)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(
+            destination,
+            format=image_format,
+            quality=options.get("quality", 85),
+        )
+
+
+@contextmanager
+def _variant_lock(name):
+    stripe = zlib.crc32(name.encode()) % LOCK_STRIPES
+    with _variant_locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        lock_path = Path(settings.MEDIA_ROOT, settings.IMAGE_CACHE_DIR)
+        with open(lock_path / f".lock-{stripe}", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_variant(image_name, preset):
+    """
+    Возвращает путь варианта изображения, создавая его при промахе.
+
+    Попадание отмечается временем доступа файла (atime), по которому
+    работает LRU-вытеснение; mtime не меняется, чтобы не сбивать ETag.
+    """
+    name = variant_name(image_name, preset)
+    path = Path(settings.MEDIA_ROOT) / name
+    try:
+        os.utime(path, (time.time(), path.stat().st_mtime))
+        return name
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _variant_lock(name):
+        if path.exists():
+            return name
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+        try:
+            resize_image(
+                Path(settings.MEDIA_ROOT) / image_name, tmp_path, preset
+            )
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    total = _add_cache_size(path.stat().st_size)
+    if total is None or total > settings.IMAGE_CACHE_MAX_BYTES:
+        evict_variants()
+    return name
+
+
+def _add_cache_size(size):
+    """
+    Прибавляет размер нового варианта к учтённому размеру кэша.
+
+    Возвращает:
+        int: Новый размер кэша или None, если учёта ещё нет
+    """
+    size_path = Path(settings.MEDIA_ROOT, settings.IMAGE_CACHE_DIR, SIZE_FILE)
+    with _variant_lock(SIZE_FILE):
+        try:
+            total = int(size_path.read_text()) + size
+        except (FileNotFoundError, ValueError):
+            return None
+        size_path.write_text(str(total))
+    return total
+
+
+def evict_variants(max_bytes=None):
+    """
+    Удаляет давно не запрошенные варианты, пока кэш больше лимита.
+
+    Обходит весь каталог кэша и записывает его точный размер в
+    SIZE_FILE; get_variant вызывает обход, только когда учтённый размер
+    превышает лимит. Чистит до 90% лимита, чтобы следующий обход
+    понадобился не на ближайшей записи.
+    """
+    max_bytes = max_bytes or settings.IMAGE_CACHE_MAX_BYTES
+    cache_dir = Path(settings.MEDIA_ROOT) / settings.IMAGE_CACHE_DIR
+    with _variant_lock(SIZE_FILE):
+        entries = []
+        total = 0
+        for path in cache_dir.glob("*/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        if total > max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= max_bytes * 0.9:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        (cache_dir / SIZE_FILE).write_text(str(total))
+    return removed
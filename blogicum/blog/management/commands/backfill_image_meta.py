@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from blog.images import read_image_metadata
+from blog.models import Post
+
+
+def _read_meta(row):
+    pk, name = row
+    try:
+        with default_storage.open(name) as file:
+            return pk, read_image_metadata(file, default_storage.size(name))
+    except OSError:
+        return pk, {}
+
+
+class Command(BaseCommand):
+    help = "Заполняет image_meta у постов, загруженных до его появления."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4),
+            help="Число потоков чтения файлов.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Размер пачки для bulk_update.",
+        )
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Пересчитать метаданные и у уже заполненных постов.",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="")
+        if not options["all"]:
+            posts = posts.filter(image_meta={})
+        posts = posts.order_by("pk").values_list("pk", "image")
+        batch_size = options["batch_size"]
+        last_pk = 0
+        updated = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while batch := list(posts.filter(pk__gt=last_pk)[:batch_size]):
+                last_pk = batch[-1][0]
+                batch_posts = [
+                    Post(pk=pk, image_meta=meta)
+                    for pk, meta in executor.map(_read_meta, batch)
+                ]
+                Post.objects.bulk_update(batch_posts, ["image_meta"])
+                updated += len(batch_posts)
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлено постов: {updated}")
+        )
@@ -0,0 +1,285 @@
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from blog.utils import get_post_queryset
+from core import loadtest
+
+COUNTER_COLUMN = "bench_comment_count"
+# Шагов виртуальной машины SQLite между вызовами счётчика
+PROGRESS_STEP = 100
+
+
+def _published():
+    return get_post_queryset(filter_published=True)
+
+
+def baseline(offset, limit):
+    """Как в ленте: JOIN, фильтр, Count("comments"), OFFSET."""
+    return list(get_post_queryset(
+        filter_published=True, annotate_comments=True
+    )[offset:offset + limit])
+
+
+def subquery_count(offset, limit):
+    """Число комментариев коррелированным подзапросом вместо GROUP BY."""
+    comments = (
+        Comment.objects.filter(post=OuterRef("pk"))
+        .order_by().values("post").annotate(total=Count("pk"))
+        .values("total")
+    )
+    return list(_published().annotate(comment_count=Coalesce(
+        Subquery(comments, output_field=IntegerField()), 0
+    ))[offset:offset + limit])
+
+
+def counter_column(offset, limit):
+    """Счётчик в колонке поста (добавляется только в базу прогона)."""
+    return list(_published().extra(
+        select={"comment_count": f"blog_post.{COUNTER_COLUMN}"}
+    )[offset:offset + limit])
+
+
+def deferred_text(offset, limit):
+    """Как baseline, но без загрузки text."""
+    return list(get_post_queryset(
+        filter_published=True, annotate_comments=True
+    ).defer("text")[offset:offset + limit])
+
+
+def keyset(offset, limit, cursor):
+    """Страница после (pub_date, pk) прошлой страницы вместо OFFSET."""
+    posts = get_post_queryset(
+        filter_published=True, annotate_comments=True
+    ).order_by("-pub_date", "-pk")
+    if cursor is not None:
+        pub_date, pk = cursor
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+    return list(posts[:limit])
+
+
+def prefiltered_ids(offset, limit):
+    """
+    Сначала ключи страницы по узкому индексу, затем посты и счётчики
+    только для них.
+    """
+    ids = list(
+        Post.objects.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now(),
+        ).order_by("-pub_date", "-pk").values_list("pk", flat=True)
+        [offset:offset + limit]
+    )
+    posts = Post.objects.select_related(
+        "author", "category", "location"
+    ).in_bulk(ids)
+    counts = dict(
+        Comment.objects.filter(post_id__in=ids).order_by()
+        .values_list("post").annotate(total=Count("pk"))
+    )
+    result = [posts[pk] for pk in ids]
+    for post in result:
+        post.comment_count = counts.get(post.pk, 0)
+    return result
+
+
+STRATEGIES = {
+    "baseline": baseline,
+    "subquery_count": subquery_count,
+    "counter_column": counter_column,
+    "deferred_text": deferred_text,
+    "keyset": keyset,
+    "prefiltered_ids": prefiltered_ids,
+}
+
+
+def add_counter_column():
+    with connection.cursor() as cursor:
+        columns = {
+            column.name for column in
+            connection.introspection.get_table_description(
+                cursor, Post._meta.db_table
+            )
+        }
+        if COUNTER_COLUMN in columns:
+            return
+        cursor.execute(
+            f"ALTER TABLE blog_post ADD COLUMN {COUNTER_COLUMN}"
+            " integer NOT NULL DEFAULT 0"
+        )
+        cursor.execute(
+            f"UPDATE blog_post SET {COUNTER_COLUMN} = (SELECT COUNT(*)"
+            " FROM blog_comment WHERE post_id = blog_post.id)"
+        )
+
+
+def measure(run):
+    """
+    Выполняет стратегию и отдельно — её SQL на сыром курсоре.
+
+    Возвращает:
+        dict: Полное время, время SQL с выборкой строк, шаги VM
+            SQLite (приближение числа прочитанных строк), строк
+            в ответах и число запросов
+    """
+    queries = []
+
+    def capture(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        start = time.perf_counter()
+        run()
+        total = time.perf_counter() - start
+
+    steps = [0]
+
+    def progress():
+        steps[0] += PROGRESS_STEP
+
+    raw = connection.connection
+    sql_time = 0.0
+    rows = 0
+    if connection.vendor == "sqlite":
+        raw.set_progress_handler(progress, PROGRESS_STEP)
+    try:
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                rows += len(cursor.fetchall())
+                sql_time += time.perf_counter() - start
+    finally:
+        if connection.vendor == "sqlite":
+            raw.set_progress_handler(None, 0)
+    return {
+        "total_ms": total * 1000,
+        "sql_ms": sql_time * 1000,
+        "python_ms": max(total - sql_time, 0) * 1000,
+        "vm_steps": steps[0],
+        "rows": rows,
+        "queries": len(queries),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает запрос ленты get_post_queryset с альтернативами на"
+        " базах разного размера: время SQL, шаги VM SQLite как оценку"
+        " прочитанных строк и время сборки моделей в Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="10000,100000",
+            help="Размеры баз в постах через запятую, например"
+                 " 10000,100000,1000000,10000000. Базы"
+                 " benchmark-<размер>.sqlite3 создаются generate_data.",
+        )
+        parser.add_argument(
+            "--pages", default="1,10,100,1000",
+            help="Номера страниц ленты через запятую.",
+        )
+        parser.add_argument(
+            "--strategies", default=",".join(STRATEGIES),
+            help="Стратегии через запятую.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output")
+
+    def handle(self, *args, **options):
+        strategies = options["strategies"].split(",")
+        pages = [int(page) for page in options["pages"].split(",")]
+        results = {}
+        for size in map(int, options["sizes"].split(",")):
+            self.use_database(size, options["seed"])
+            results[size] = self.run_size(strategies, pages, options)
+        output = Path(options["output"] or (
+            settings.BASE_DIR / "benchmarks"
+            / f"feed-{timezone.now():%Y%m%dT%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        loadtest.save(output, results, {
+            "time": timezone.now().isoformat(),
+            "repeat": options["repeat"],
+            "vendor": connection.vendor,
+        })
+        self.stdout.write(f"Результат: {output}")
+
+    def use_database(self, size, seed):
+        path = settings.BASE_DIR / f"benchmark-{size}.sqlite3"
+        loadtest.switch_database(path)
+        if not path.exists() or not Post.objects.exists():
+            call_command("migrate", verbosity=0, interactive=False)
+            call_command(
+                "generate_data", seed=seed, posts=size, stdout=self.stdout
+            )
+        add_counter_column()
+
+    def run_size(self, strategies, pages, options):
+        limit = settings.PAGINATOR_VALUE
+        published = _published().count()
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Постов: {Post.objects.count()}, опубликовано: {published}"
+        ))
+        self.stdout.write(
+            f"{'стратегия':<17}{'стр.':>6}{'всего':>9}{'SQL':>9}"
+            f"{'Python':>9}{'шаги VM':>12}{'строк':>7}{'SQL-запр.':>10}"
+        )
+        results = {}
+        for page in pages:
+            offset = (page - 1) * limit
+            if offset >= published:
+                continue
+            cursor = None
+            if offset:
+                cursor = _published().order_by(
+                    "-pub_date", "-pk"
+                ).values_list("pub_date", "pk")[offset - 1]
+            expected = None
+            for name in strategies:
+                strategy = STRATEGIES[name]
+                args = (offset, limit, cursor) if name == "keyset" else (
+                    offset, limit
+                )
+                # Сравнивать можно только запросы с одинаковым ответом
+                ids = [post.pk for post in strategy(*args)]
+                if expected is None:
+                    expected = ids
+                elif ids != expected:
+                    raise CommandError(
+                        f"Стратегия {name} на странице {page} возвращает"
+                        f" другие посты, чем {strategies[0]}."
+                    )
+                samples = [
+                    measure(lambda: strategy(*args))
+                    for _ in range(options["repeat"])
+                ]
+                summary = {
+                    key: round(statistics.median(
+                        sample[key] for sample in samples
+                    ), 3)
+                    for key in samples[0]
+                }
+                results.setdefault(name, {})[page] = summary
+                self.stdout.write(
+                    f"{name:<17}{page:>6}{summary['total_ms']:>9.2f}"
+                    f"{summary['sql_ms']:>9.2f}{summary['python_ms']:>9.2f}"
+                    f"{summary['vm_steps']:>12.0f}{summary['rows']:>7.0f}"
+                    f"{summary['queries']:>10.0f}"
+                )
+        return results
@@ -0,0 +1,216 @@
+import json
+import platform
+import random
+import secrets
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.management.commands.generate_data import PASSWORD
+from blog.models import Category, Comment, Post
+from blog.utils import get_post_queryset
+from core import loadtest
+
+User = get_user_model()
+
+# Глубины ленты: первые страницы популярны, дальние дороги для OFFSET
+FEED_PAGES = (1, 1, 1, 2, 3, 5, 10, 50, 200)
+SAMPLE_SIZE = 500
+CSRF_TOKEN_LENGTH = 32
+
+
+class Dataset:
+    """Адреса и пользователи из базы, по которым строятся сценарии."""
+
+    def __init__(self, password, seed=0):
+        posts = get_post_queryset(filter_published=True)
+        rng = random.Random(seed)
+        self.password = password
+        self.feed_pages = max(
+            posts.count() // settings.PAGINATOR_VALUE, 1
+        )
+        self.heavy_posts = list(
+            posts.annotate(comment_total=Count("comments"))
+            .order_by("-comment_total")
+            .values_list("pk", flat=True)[:50]
+        )
+        self.posts = loadtest.sample(
+            posts.values_list("pk", flat=True), SAMPLE_SIZE, rng
+        )
+        self.categories = list(
+            Category.objects.filter(is_published=True)
+            .values_list("slug", flat=True)
+        )
+        self.authors = list(
+            User.objects.annotate(post_total=Count("posts"))
+            .order_by("-post_total")
+            .values_list("username", flat=True)[:SAMPLE_SIZE]
+        )
+        self.users = loadtest.sample(
+            User.objects.values_list("username", flat=True), SAMPLE_SIZE, rng
+        )
+        if not (self.posts and self.categories and self.users):
+            raise CommandError(
+                "В базе нет опубликованных постов; заполните её"
+                " командой generate_data."
+            )
+
+    def scenarios(self):
+        def feed(client, rng):
+            page = min(rng.choice(FEED_PAGES), self.feed_pages)
+            return "GET", f"/?page={page}", None
+
+        def heavy_post(client, rng):
+            return "GET", f"/posts/{rng.choice(self.heavy_posts)}/", None
+
+        def post(client, rng):
+            return "GET", f"/posts/{rng.choice(self.posts)}/", None
+
+        def category(client, rng):
+            page = rng.choice(FEED_PAGES[:6])
+            slug = rng.choice(self.categories)
+            return "GET", f"/category/{slug}/?page={page}", None
+
+        def profile(client, rng):
+            return "GET", f"/profile/{rng.choice(self.authors)}/", None
+
+        def comment(client, rng):
+            return "POST", f"/posts/{rng.choice(self.posts)}/comment/", {
+                "text": "Комментарий нагрузочного теста",
+                "csrfmiddlewaretoken": client.cookies["csrftoken"].value,
+            }
+
+        def login(client, rng):
+            return "POST", "/auth/login/", self.login_data(client, rng)
+
+        return [
+            (40, feed), (15, heavy_post), (15, post), (10, category),
+            (10, profile), (5, comment), (5, login),
+        ]
+
+    def login_data(self, client, rng):
+        return {
+            "username": rng.choice(self.users),
+            "password": self.password,
+            "csrfmiddlewaretoken": client.cookies["csrftoken"].value,
+        }
+
+    def setup(self, client, rng):
+        """Cookie CSRF и вход под случайным пользователем."""
+        client.cookies["csrftoken"] = secrets.token_hex(
+            CSRF_TOKEN_LENGTH // 2
+        )
+        client.request("POST", "/auth/login/", self.login_data(client, rng))
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест URL блога внутри процесса через WSGI: смесь"
+        " ленты, постов, категорий, профилей, комментариев и входов."
+        " Печатает и сохраняет в JSON запросы в секунду и p50/p95/p99"
+        " по именам URL, сравнивает с базовым прогоном."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--db", default=settings.BASE_DIR / "benchmark.sqlite3",
+            help="Файл SQLite для прогона; если его нет, он создаётся"
+                 " и заполняется generate_data.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--posts", type=int, default=20_000,
+            help="Число постов при создании базы.",
+        )
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--duration", type=float, default=30,
+            help="Длительность прогона в секундах.",
+        )
+        parser.add_argument(
+            "--requests", type=int,
+            help="Число запросов вместо длительности.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Файл результата; по умолчанию benchmarks/<время>.json.",
+        )
+        parser.add_argument(
+            "--baseline", help="Результат прошлого прогона для сравнения.",
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2,
+            help="Допустимый рост p95 относительно базового прогона.",
+        )
+
+    def use_database(self, path, options):
+        loadtest.switch_database(path)
+        if not Path(path).exists() or not Post.objects.exists():
+            call_command("migrate", verbosity=0, interactive=False)
+            call_command(
+                "generate_data", seed=options["seed"],
+                posts=options["posts"], stdout=self.stdout,
+            )
+
+    def handle(self, *args, **options):
+        self.use_database(options["db"], options)
+        dataset = Dataset(PASSWORD, options["seed"])
+        records, elapsed = loadtest.run(
+            dataset.scenarios(),
+            options["concurrency"],
+            duration=None if options["requests"] else options["duration"],
+            requests=options["requests"],
+            seed=options["seed"],
+            setup=dataset.setup,
+        )
+        summary = loadtest.summarize(records, elapsed)
+        self.print_summary(summary)
+        output = Path(options["output"] or (
+            settings.BASE_DIR / "benchmarks"
+            / f"{timezone.now():%Y%m%dT%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        loadtest.save(output, summary, {
+            "time": timezone.now().isoformat(),
+            "seed": options["seed"],
+            "concurrency": options["concurrency"],
+            "elapsed": round(elapsed, 3),
+            "posts": Post.objects.count(),
+            "comments": Comment.objects.count(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        })
+        self.stdout.write(f"Результат: {output}")
+        if options["baseline"]:
+            self.check_baseline(summary, options)
+
+    def print_summary(self, summary):
+        self.stdout.write(
+            f"{'URL':<24}{'запросов':>10}{'ошибок':>8}{'rps':>9}"
+            f"{'p50':>9}{'p95':>9}{'p99':>9}"
+        )
+        for name, stats in summary.items():
+            self.stdout.write(
+                f"{name:<24}{stats['requests']:>10}{stats['errors']:>8}"
+                f"{stats['rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+                f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+            )
+
+    @staticmethod
+    def check_baseline(summary, options):
+        with open(options["baseline"], encoding="utf-8") as baseline:
+            previous = json.load(baseline)["results"]
+        regressions = loadtest.compare(
+            summary, previous, options["tolerance"]
+        )
+        if regressions:
+            raise CommandError("Регрессия p95: " + ", ".join(
+                f"{name} {before:.1f} -> {after:.1f} мс"
+                for name, (before, after) in regressions.items()
+            ))
@@ -0,0 +1,141 @@
+import heapq
+import os
+import shutil
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+ACTION_REPORT = "report"
+ACTION_QUARANTINE = "quarantine"
+ACTION_DELETE = "delete"
+
+
+def _write_run(names, directory):
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, delete=False, encoding="utf-8"
+    ) as run:
+        run.writelines(f"{name}\n" for name in sorted(names))
+    return run.name
+
+
+def _read_run(path):
+    with open(path, encoding="utf-8") as run:
+        for line in run:
+            yield line.rstrip("\n")
+
+
+def sorted_media_files(root, subdir, chunk_size, tmpdir):
+    """
+    Отдаёт пути файлов каталога в отсортированном порядке.
+
+    Каталог читается кусками по `chunk_size` имён: каждый кусок
+    сортируется и сбрасывается во временный файл, затем куски
+    сливаются heapq.merge — в памяти не больше одного куска.
+    """
+    runs = []
+    names = os.walk(Path(root) / subdir)
+    files = (
+        os.path.relpath(os.path.join(dirpath, filename), root)
+        .replace(os.sep, "/")
+        for dirpath, _, filenames in names
+        for filename in filenames
+    )
+    while chunk := list(islice(files, chunk_size)):
+        runs.append(_write_run(chunk, tmpdir))
+    yield from heapq.merge(*(_read_run(run) for run in runs))
+
+
+def referenced_media_files(subdir, chunk_size):
+    """Отдаёт пути изображений из blog_post в отсортированном порядке."""
+    return (
+        Post.objects.filter(image__startswith=f"{subdir}/")
+        .order_by("image")
+        .values_list("image", flat=True)
+        .distinct()
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def orphaned(files, referenced):
+    """Разность двух отсортированных потоков слиянием за один проход."""
+    reference = next(referenced, None)
+    for name in files:
+        while reference is not None and reference < name:
+            reference = next(referenced, None)
+        if reference != name:
+            yield name
+
+
+class Command(BaseCommand):
+    help = (
+        "Находит файлы изображений постов, на которые не ссылается ни один"
+        " пост, и переносит их в карантин или удаляет."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--action",
+            choices=(ACTION_REPORT, ACTION_QUARANTINE, ACTION_DELETE),
+            default=ACTION_REPORT,
+            help="Что сделать с найденными файлами (по умолчанию — вывести).",
+        )
+        parser.add_argument(
+            "--min-age", type=int, default=24 * 60 * 60,
+            help=(
+                "Не трогать файлы моложе указанного числа секунд: пост"
+                " с только что загруженным файлом мог ещё не сохраниться."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=10000,
+            help="Сколько имён держать в памяти при сортировке.",
+        )
+        parser.add_argument(
+            "--subdir",
+            default=Post._meta.get_field("image").upload_to,
+            help="Каталог внутри MEDIA_ROOT с изображениями постов.",
+        )
+
+    def handle(self, *args, **options):
+        media_root = Path(settings.MEDIA_ROOT)
+        action = options["action"]
+        deadline = time.time() - options["min_age"]
+        quarantine = media_root / settings.MEDIA_QUARANTINE_DIR / (
+            time.strftime("%Y%m%d-%H%M%S")
+        )
+        found = 0
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = sorted_media_files(
+                media_root, options["subdir"], options["chunk_size"], tmpdir
+            )
+            referenced = referenced_media_files(
+                options["subdir"], options["chunk_size"]
+            )
+            for name in orphaned(files, referenced):
+                path = media_root / name
+                try:
+                    if path.stat().st_mtime > deadline:
+                        continue
+                except FileNotFoundError:
+                    continue
+                # Повторная точечная проверка: пост мог сослаться на файл
+                # уже после того, как курсор прошёл это имя.
+                if Post.objects.filter(image=name).exists():
+                    continue
+                found += 1
+                self.stdout.write(name)
+                if action == ACTION_QUARANTINE:
+                    target = quarantine / name
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(path, target)
+                elif action == ACTION_DELETE:
+                    path.unlink(missing_ok=True)
+        self.stdout.write(
+            self.style.SUCCESS(f"Осиротевших файлов: {found} ({action})")
+        )
@@ -0,0 +1,275 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, count as counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+WORDS = (
+    "блог пост утро город река поезд книга кофе лето дождь море горы"
+    " дорога друг работа вечер музыка кино история фото парк зима"
+    " весна осень ночь окно путь дом сад небо звезда ветер мост"
+).split()
+PASSWORD = "password"
+HISTORY_DAYS = 3 * 365
+FUTURE_DAYS = 60
+# Тексты берутся из заранее собранного пула: генерация каждого
+# заметно дороже его вставки
+TEXT_POOL_SIZE = 4096
+
+
+@contextmanager
+def _explicit_created_at(*models):
+    """Даёт записать свои значения в created_at с auto_now_add."""
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(pk=Max("pk"))["pk"] or 0) + 1
+
+
+class Generator:
+    """
+    Детерминированный по seed генератор данных блога.
+
+    Авторы выбираются по закону Ципфа, число комментариев у поста —
+    по Парето, поэтому есть и авторы с тысячами постов, и посты
+    с тысячами комментариев. Ключи назначаются явно, чтобы не читать
+    их обратно после bulk_create.
+    """
+
+    def __init__(self, seed, now, batch_size, write):
+        self.rng = random.Random(seed)
+        self.now = now
+        self.batch_size = batch_size
+        self.write = write
+        self.pools = {}
+
+    def sentence(self, words):
+        return " ".join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def text(self, min_words, max_words):
+        pool = self.pools.get((min_words, max_words))
+        if pool is None:
+            pool = self.pools[min_words, max_words] = [
+                self.sentence(self.rng.randint(min_words, max_words))
+                for _ in range(TEXT_POOL_SIZE)
+            ]
+        return pool[self.rng.randrange(TEXT_POOL_SIZE)]
+
+    def past(self, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def insert(self, model, objects):
+        """Пишет объекты пачками по batch_size в одной транзакции на пачку."""
+        batch = []
+        written = 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                written += self._flush(model, batch)
+        written += self._flush(model, batch)
+        self.write(f"{model._meta.verbose_name_plural}: {written}")
+
+    @staticmethod
+    def _flush(model, batch):
+        written = len(batch)
+        if written:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            batch.clear()
+        return written
+
+    def users(self, count):
+        # Хеш вычисляется один раз: PBKDF2 на каждого пользователя
+        # занял бы часы, а у всех одинаковый пароль.
+        password = make_password(PASSWORD)
+        start = _next_pk(User)
+        self.insert(User, (
+            User(
+                pk=pk,
+                username=f"user{pk}",
+                email=f"user{pk}@example.com",
+                password=password,
+                date_joined=self.past(),
+            )
+            for pk in range(start, start + count)
+        ))
+        return list(range(start, start + count))
+
+    def published_flags(self, model, count, unpublished_share):
+        start = _next_pk(model)
+        flags = [
+            self.rng.random() >= unpublished_share for _ in range(count)
+        ]
+        return start, flags
+
+    def categories(self, count, unpublished_share):
+        start, flags = self.published_flags(
+            Category, count, unpublished_share
+        )
+        self.insert(Category, (
+            Category(
+                pk=start + i,
+                title=self.sentence(2),
+                description=self.sentence(12),
+                slug=f"category-{start + i}",
+                is_published=is_published,
+                created_at=self.past(),
+            )
+            for i, is_published in enumerate(flags)
+        ))
+        return list(range(start, start + count))
+
+    def locations(self, count, unpublished_share):
+        start, flags = self.published_flags(
+            Location, count, unpublished_share
+        )
+        self.insert(Location, (
+            Location(
+                pk=start + i,
+                name=self.sentence(1),
+                is_published=is_published,
+                created_at=self.past(),
+            )
+            for i, is_published in enumerate(flags)
+        ))
+        return list(range(start, start + count))
+
+    def post_dates(self, future_share):
+        if self.rng.random() < future_share:
+            return self.now + timedelta(
+                seconds=self.rng.randrange(1, FUTURE_DAYS * 86400)
+            )
+        return self.past()
+
+    def posts(self, count, users, categories, locations, options):
+        # Закон Ципфа: i-й автор пишет пропорционально 1 / i^s
+        weights = list(accumulate(
+            1 / rank ** options["author_skew"]
+            for rank in range(1, len(users) + 1)
+        ))
+        start = _next_pk(Post)
+        rng = self.rng
+        self.insert(Post, (
+            Post(
+                pk=pk,
+                author_id=rng.choices(users, cum_weights=weights)[0],
+                title=self.text(2, 6),
+                text=self.text(20, 120),
+                pub_date=self.post_dates(options["future_share"]),
+                is_published=rng.random() >= options["unpublished_share"],
+                category_id=rng.choice(categories) if categories else None,
+                location_id=(
+                    rng.choice(locations)
+                    if locations and rng.random() < 0.7 else None
+                ),
+                created_at=self.past(),
+            )
+            for pk in range(start, start + count)
+        ))
+        return range(start, start + count)
+
+    def comments(self, posts, users, alpha, max_per_post):
+        rng = self.rng
+        pks = counter(_next_pk(Comment))
+
+        def generate():
+            for post_id in posts:
+                # Парето с минимумом 1: у большинства постов 0–2
+                # комментария, у немногих — тысячи
+                comments = int(rng.paretovariate(alpha)) - 1
+                for _ in range(min(comments, max_per_post)):
+                    yield Comment(
+                        pk=next(pks),
+                        post_id=post_id,
+                        author_id=rng.choice(users),
+                        text=self.text(3, 30)[:256],
+                        created_at=self.past(),
+                    )
+
+        self.insert(Comment, generate())
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными для нагрузочных тестов:"
+        " пользователи, категории, местоположения, посты и комментарии."
+        " При одинаковых --seed и --now данные совпадают."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--now",
+            help="Дата отсчёта YYYY-MM-DD для pub_date; по умолчанию"
+                 " сегодняшняя полночь.",
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--locations", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=100_000)
+        parser.add_argument(
+            "--author-skew", type=float, default=1.1,
+            help="Показатель закона Ципфа для числа постов у авторов.",
+        )
+        parser.add_argument(
+            "--comment-alpha", type=float, default=1.2,
+            help="Параметр Парето для числа комментариев у поста:"
+                 " чем меньше, тем тяжелее хвост.",
+        )
+        parser.add_argument("--max-comments", type=int, default=5000)
+        parser.add_argument(
+            "--unpublished-share", type=float, default=0.05,
+            help="Доля скрытых постов, категорий и местоположений.",
+        )
+        parser.add_argument(
+            "--future-share", type=float, default=0.05,
+            help="Доля постов с pub_date в будущем.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now().replace(hour=0, minute=0, second=0,
+                                     microsecond=0)
+        if options["now"]:
+            now = timezone.make_aware(
+                timezone.datetime.fromisoformat(options["now"])
+            )
+        generator = Generator(
+            options["seed"], now, options["batch_size"], self.stdout.write
+        )
+        if connection.vendor == "sqlite" and not connection.in_atomic_block:
+            # Данные можно сгенерировать заново, поэтому надёжность
+            # записи на время генерации не нужна
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous = OFF")
+        share = options["unpublished_share"]
+        with _explicit_created_at(Category, Location, Post, Comment):
+            users = generator.users(options["users"])
+            categories = generator.categories(options["categories"], share)
+            locations = generator.locations(options["locations"], share)
+            posts = generator.posts(
+                options["posts"], users, categories, locations, options
+            )
+            generator.comments(
+                posts, users, options["comment_alpha"],
+                options["max_comments"]
+            )
+        self.stdout.write(self.style.SUCCESS("Готово"))
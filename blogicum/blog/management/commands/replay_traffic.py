@@ -0,0 +1,228 @@
+import random
+import secrets
+import threading
+from collections import Counter
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from core import loadtest
+from core.log import read_json_lines
+from core.traffic import (
+    ANONYMIZED_KWARGS, AUTH_ANONYMOUS, AUTH_STAFF, anonymize, replay
+)
+
+User = get_user_model()
+
+SAFE_METHODS = {"GET", "HEAD"}
+# Тела запросов не пишутся: для изменяющих запросов, которые можно
+# воспроизвести, формы заполняются здесь. Остальные пропускаются.
+POST_DATA = {
+    "blog:add_comment": {"text": "Комментарий воспроизведения трафика"},
+    "blog:edit_comment": {"text": "Изменённый комментарий"},
+    "blog:delete_comment": {},
+}
+# Представления, доступные только автору объекта из аргумента
+OWNER_LOOKUPS = {
+    "blog:edit_comment": (Comment, "comment_id"),
+    "blog:delete_comment": (Comment, "comment_id"),
+    "blog:edit_post": (Post, "post_id"),
+    "blog:delete_post": (Post, "post_id"),
+}
+BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+class Replayer:
+    """Превращает записи журнала в запросы к копии базы."""
+
+    def __init__(self, seed):
+        self.app = WSGIHandler()
+        self.usernames = {
+            anonymize(username): username
+            for username in User.objects.values_list(
+                "username", flat=True
+            ).iterator()
+        }
+        self.staff = User.objects.filter(is_staff=True).first()
+        self.rng = random.Random(seed)
+        self.user_ids = loadtest.sample(
+            User.objects.values_list("pk", flat=True), 1000, self.rng
+        )
+        self.sessions = {}
+        self.skipped = Counter()
+        self.lock = threading.Lock()
+        self.session_store = import_module(
+            settings.SESSION_ENGINE
+        ).SessionStore
+
+    def kwargs(self, entry):
+        kwargs = dict(entry["kwargs"])
+        for name in ANONYMIZED_KWARGS & kwargs.keys():
+            if kwargs[name] not in self.usernames:
+                return None
+            kwargs[name] = self.usernames[kwargs[name]]
+        return kwargs
+
+    def user_id(self, entry, kwargs):
+        if entry["auth"] == AUTH_ANONYMOUS:
+            return None
+        if entry["auth"] == AUTH_STAFF and self.staff is not None:
+            return self.staff.pk
+        if entry["own"] and "username" in kwargs:
+            return User.objects.get(username=kwargs["username"]).pk
+        if entry["view"] in OWNER_LOOKUPS:
+            model, kwarg = OWNER_LOOKUPS[entry["view"]]
+            author_id = model.objects.filter(pk=kwargs[kwarg]).values_list(
+                "author_id", flat=True
+            ).first()
+            if author_id is not None:
+                return author_id
+        with self.lock:
+            return self.rng.choice(self.user_ids)
+
+    def session_key(self, user_id):
+        """Сессия вошедшего пользователя без проверки пароля."""
+        with self.lock:
+            if user_id in self.sessions:
+                return self.sessions[user_id]
+        user = User.objects.get(pk=user_id)
+        session = self.session_store()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = BACKEND
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        with self.lock:
+            self.sessions[user_id] = session.session_key
+        return session.session_key
+
+    def skip(self, reason):
+        with self.lock:
+            self.skipped[reason] += 1
+
+    def send(self, entry):
+        view = entry["view"]
+        if entry["method"] not in SAFE_METHODS and view not in POST_DATA:
+            return self.skip("изменяющий запрос без формы")
+        kwargs = self.kwargs(entry)
+        if kwargs is None:
+            return self.skip("пользователя нет в базе")
+        try:
+            path = reverse(view, kwargs=kwargs)
+        except NoReverseMatch:
+            return self.skip("маршрута нет")
+        if entry["page"]:
+            path += f"?page={entry['page']}"
+        client = loadtest.WSGIClient(self.app)
+        token = secrets.token_hex(16)
+        client.cookies["csrftoken"] = token
+        user_id = self.user_id(entry, kwargs)
+        if user_id is not None:
+            client.cookies[settings.SESSION_COOKIE_NAME] = (
+                self.session_key(user_id)
+            )
+        data = None
+        if entry["method"] not in SAFE_METHODS:
+            data = {**POST_DATA[view], "csrfmiddlewaretoken": token}
+        status, _, _ = client.request(entry["method"], path, data)
+        return status
+
+
+class Command(BaseCommand):
+    help = (
+        "Воспроизводит журнал TrafficCaptureMiddleware на копии базы с"
+        " исходной или ускоренной скоростью и сравнивает распределения"
+        " задержек по представлениям с записанными."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log", default=settings.TRAFFIC_CAPTURE_LOG,
+            help="Журнал запросов (ротированные копии читаются тоже).",
+        )
+        parser.add_argument(
+            "--db", required=True,
+            help="Файл SQLite копии базы: воспроизведение пишет"
+                 " комментарии и сессии, поэтому рабочая база запрещена.",
+        )
+        parser.add_argument(
+            "--speed", type=float, default=1.0,
+            help="Ускорение относительно записи; 0 — без пауз.",
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            help="Файл результата; по умолчанию benchmarks/replay-<время>"
+                 ".json.",
+        )
+
+    def handle(self, *args, **options):
+        configured = settings.DATABASES["default"]["NAME"]
+        if Path(options["db"]).resolve() == Path(configured).resolve():
+            raise CommandError(
+                "--db указывает на настроенную базу; воспроизводите"
+                " трафик только на её копии."
+            )
+        loadtest.switch_database(options["db"])
+        entries = list(read_json_lines(options["log"]))
+        if not entries:
+            raise CommandError(f"Журнал {options['log']} пуст.")
+        replayer = Replayer(options["seed"])
+        started = timezone.now()
+        records = replay(
+            entries, replayer.send, options["speed"], options["concurrency"]
+        )
+        elapsed = (timezone.now() - started).total_seconds()
+        times = [entry["time"] for entry in entries]
+        span = max(times) - min(times)
+        recorded = loadtest.summarize(
+            [(entry["view"], entry["duration_ms"] / 1000, entry["status"])
+             for entry in entries],
+            span,
+        )
+        replayed = loadtest.summarize(records, elapsed)
+        self.print_comparison(recorded, replayed)
+        for reason, count in replayer.skipped.items():
+            self.stdout.write(f"Пропущено ({reason}): {count}")
+        output = Path(options["output"] or (
+            settings.BASE_DIR / "benchmarks"
+            / f"replay-{started:%Y%m%dT%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        loadtest.save(
+            output, {"recorded": recorded, "replayed": replayed},
+            {
+                "time": started.isoformat(),
+                "log": str(options["log"]),
+                "speed": options["speed"],
+                "concurrency": options["concurrency"],
+                "skipped": dict(replayer.skipped),
+            },
+        )
+        self.stdout.write(f"Результат: {output}")
+
+    def print_comparison(self, recorded, replayed):
+        self.stdout.write(
+            f"{'URL':<24}{'запросов':>10}"
+            f"{'p50 было':>10}{'p50 стало':>11}"
+            f"{'p95 было':>10}{'p95 стало':>11}"
+            f"{'p99 было':>10}{'p99 стало':>11}"
+        )
+        empty = dict.fromkeys(("requests", "p50_ms", "p95_ms", "p99_ms"), 0)
+        for name, stats in replayed.items():
+            before = recorded.get(name, empty)
+            self.stdout.write(
+                f"{name:<24}{stats['requests']:>10}"
+                f"{before['p50_ms']:>10.1f}{stats['p50_ms']:>11.1f}"
+                f"{before['p95_ms']:>10.1f}{stats['p95_ms']:>11.1f}"
+                f"{before['p99_ms']:>10.1f}{stats['p99_ms']:>11.1f}"
+            )
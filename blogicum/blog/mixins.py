@@ -1,22 +1,84 @@
+from http import HTTPStatus
+
 from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
-from django.shortcuts import redirect
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 
 from .models import Comment
 from .forms import CommentForm
 
+FRAGMENT_HEADER = "X-Fragment"
+
 
 class AuthorRequiredMixin(UserPassesTestMixin):
     """Миксин для проверки авторства."""
 
     def test_func(self):
-        return self.get_object().author == self.request.user
+        return self.get_object().author_id == self.request.user.id
 
     def handle_no_permission(self):
         return redirect("blog:post_detail", post_id=self.kwargs["post_id"])
 
 
+class FragmentMixin:
+    """
+    Режим фрагментов для представлений комментариев.
+
+    Если запрос пришёл с заголовком X-Fragment, вместо страницы с формой
+    отдаётся только форма, а вместо перенаправления на пост — разметка
+    добавленного или изменённого комментария. Ошибки формы дают 400,
+    и страница повторяет отправку без фрагментов.
+    """
+
+    fragment_template_name = "includes/comment_form.html"
+
+    @property
+    def is_fragment(self):
+        return FRAGMENT_HEADER in self.request.headers
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        patch_vary_headers(response, (FRAGMENT_HEADER,))
+        return response
+
+    def get_template_names(self):
+        if self.is_fragment:
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(fragment=self.is_fragment, **kwargs)
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if not self.is_fragment:
+            return response
+        return self.render_fragment()
+
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if self.is_fragment:
+            response.status_code = HTTPStatus.BAD_REQUEST
+        return response
+
+    def render_fragment(self):
+        return render(self.request, "includes/comments.html", {
+            "post": self.object.post,
+            "comments": [self.object],
+            "fragment": True,
+        })
+
+
+class DeleteFragmentMixin(FragmentMixin):
+    """Режим фрагментов для удаления: пустой ответ убирает комментарий."""
+
+    def render_fragment(self):
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
 class CommentMixin(LoginRequiredMixin, AuthorRequiredMixin):
     """Базовый миксин для представлений комментариев."""
 
@@ -26,7 +88,7 @@ class CommentMixin(LoginRequiredMixin, AuthorRequiredMixin):
 
     def get_object(self):
         return get_object_or_404(
-            Comment,
+            Comment.objects.select_related("author", "post"),
             id=self.kwargs["comment_id"],
             post_id=self.kwargs["post_id"]
         )
@@ -1,10 +1,18 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.dispatch import Signal
+
+from .images import read_image_metadata
 
 User = get_user_model()
 
 TITLE_MAX_LENGTH = 256
 
+# Отправляется из Comment.delete() с аргументом pk. Слушатели
+# post_delete у Comment запретили бы удалять комментарии поста
+# одним запросом при удалении самого поста
+comment_deleted = Signal()
+
 
 class BaseModel(models.Model):
     is_published = models.BooleanField(
@@ -84,6 +92,13 @@ class Post(BaseModel):
         upload_to="post_images",
         blank=True
     )
+    image_meta = models.JSONField(
+        verbose_name="Параметры изображения",
+        help_text="Ширина, высота, размер в байтах и формат.",
+        default=dict,
+        blank=True,
+        editable=False
+    )
     location = models.ForeignKey(
         Location,
         on_delete=models.SET_NULL,
@@ -103,10 +118,23 @@ class Post(BaseModel):
         verbose_name_plural = "Публикации"
         default_related_name = "posts"
         ordering = ["-pub_date"]
+        indexes = (
+            # Подгрузка лент по курсору (pub_date, id)
+            models.Index(fields=("pub_date",), name="post_pub_date_idx"),
+        )
 
     def __str__(self):
         return self.title[:50]
 
+    def save(self, *args, **kwargs):
+        if not self.image:
+            self.image_meta = {}
+        elif not self.image._committed:
+            self.image_meta = read_image_metadata(
+                self.image.file, self.image.size
+            )
+        super().save(*args, **kwargs)
+
 
 class Comment(BaseModel):
     text = models.TextField("Текст комментария", max_length=256)
@@ -132,6 +160,19 @@ class Comment(BaseModel):
         verbose_name = "комментарий"
         verbose_name_plural = "Комментарии"
         ordering = ("-created_at",)
+        indexes = (
+            # Страницы комментариев поста по курсору (created_at, id)
+            models.Index(
+                fields=("post", "created_at"),
+                name="comment_post_created_idx",
+            ),
+        )
 
     def __str__(self):
         return f"Комментарий пользователя {self.author} к посту {self.post}"
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        comment_deleted.send(sender=Comment, pk=pk)
+        return result
@@ -11,6 +11,16 @@ post_patterns = [
         views.PostDetailView.as_view(),
         name='post_detail'
     ),
+    path(
+        '<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        '<int:post_id>/image/<slug:preset>/',
+        views.post_image,
+        name='post_image'
+    ),
     path(
         'create/',
         views.PostCreateView.as_view(),
@@ -48,6 +58,7 @@ comment_patterns = [
 
 urlpatterns = [
     path('', views.PostListView.as_view(), name='index'),
+    path('fragment/', views.index_fragment, name='index_fragment'),
     path('posts/', include(post_patterns)),
     path('posts/', include(comment_patterns)),
     path(
@@ -55,11 +66,21 @@ urlpatterns = [
         views.category_posts,
         name='category_posts'
     ),
+    path(
+        'category/<slug:category_slug>/fragment/',
+        views.category_fragment,
+        name='category_fragment'
+    ),
     path(
         'profile/<str:username>/',
         views.profile_detail,
         name='profile'
     ),
+    path(
+        'profile/<str:username>/fragment/',
+        views.profile_fragment,
+        name='profile_fragment'
+    ),
     path(
         'edit_profile/',
         views.edit_profile,
@@ -1,10 +1,16 @@
-from django.db.models import Count
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Q
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.conf import settings
+from django.shortcuts import get_object_or_404
 
 from .models import Post
 
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
 
 def get_post_queryset(
     queryset=Post.objects,
@@ -44,7 +50,7 @@ def get_post_queryset(
             comment_count=Count("comments")
         )
 
-    return queryset.order_by("-pub_date")
+    return queryset.order_by("-pub_date", "-pk")
 
 
 def get_paginator_page(queryset, request):
@@ -52,3 +58,82 @@ def get_paginator_page(queryset, request):
     paginator = Paginator(queryset, settings.PAGINATOR_VALUE)
     page_number = request.GET.get("page")
     return paginator.get_page(page_number)
+
+
+def get_feed_context(page_obj):
+    """
+    Курсор после последнего поста страницы и номер следующей
+    страницы для подгрузки ленты; пустой, если страница последняя.
+    """
+    if not page_obj.has_next():
+        return {}
+    last = page_obj[-1]
+    return {
+        "next_cursor": encode_cursor(last.pub_date, last.pk),
+        "next_page": page_obj.next_page_number(),
+    }
+
+
+def get_visible_post(post_id, user):
+    """
+    Возвращает пост, видимый пользователю: автору — любой свой,
+    остальным — только опубликованный.
+    """
+    post = get_object_or_404(get_post_queryset(), pk=post_id)
+    if post.author != user:
+        post = get_object_or_404(
+            get_post_queryset(filter_published=True),
+            pk=post_id
+        )
+    return post
+
+
+def encode_cursor(moment, pk):
+    """Курсор keyset-пагинации: время в микросекундах и первичный ключ."""
+    return f"{(moment - EPOCH) // MICROSECOND}_{pk}"
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор encode_cursor; для неверного возвращает None."""
+    micros, _, pk = (cursor or "").partition("_")
+    try:
+        return EPOCH + int(micros) * MICROSECOND, int(pk)
+    except (ValueError, OverflowError):
+        return None
+
+
+def get_keyset_page(queryset, field, cursor, size, descending=False):
+    """
+    Получает страницу после курсора по паре (field, pk).
+
+    В отличие от OFFSET, стоимость не зависит от номера страницы: при
+    индексе, начинающемся с фильтра queryset и field, база читает
+    только size + 1 строк.
+
+    Возвращает:
+        tuple: Объекты страницы и курсор следующей или None
+    """
+    prefix, lookup = ("-", "lt") if descending else ("", "gt")
+    queryset = queryset.order_by(f"{prefix}{field}", f"{prefix}pk")
+    position = decode_cursor(cursor)
+    if position is not None:
+        moment, pk = position
+        queryset = queryset.filter(
+            Q(**{f"{field}__{lookup}": moment})
+            | Q(**{field: moment, f"pk__{lookup}": pk})
+        )
+    items = list(queryset[:size + 1])
+    if len(items) <= size:
+        return items, None
+    last = items[size - 1]
+    return items[:size], encode_cursor(getattr(last, field), last.pk)
+
+
+def get_comment_page(post, cursor):
+    """Страница комментариев поста в порядке добавления."""
+    return get_keyset_page(
+        post.comments.select_related("author"),
+        "created_at",
+        cursor,
+        settings.COMMENTS_PAGE_SIZE,
+    )
@@ -1,19 +1,36 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.auth import get_user_model, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LogoutView
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy, reverse
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
 from django.views.generic import (
     ListView, UpdateView, CreateView, DeleteView, DetailView
 )
+from PIL import UnidentifiedImageError
+
+from core.budgets import memory_budget, query_budget
+from core.views import serve_media
 
 from .models import Category, Post, Comment
 from .forms import PostForm, CommentForm, UserForm, UserRegistrationForm
-from .utils import get_post_queryset, get_paginator_page
-from .mixins import AuthorRequiredMixin, CommentMixin, CommentUpdateMixin
+from .images import get_variant
+from .utils import (
+    decode_cursor, get_comment_page, get_feed_context, get_keyset_page,
+    get_post_queryset, get_paginator_page, get_visible_post
+)
+from .mixins import (
+    AuthorRequiredMixin, CommentMixin, CommentUpdateMixin,
+    DeleteFragmentMixin, FragmentMixin
+)
 
 User = get_user_model()
 PAGE_NUMBER = "page"
@@ -25,6 +42,8 @@ class PostListView(ListView):
     model = Post
     template_name = "blog/index.html"
     paginate_by = settings.PAGINATOR_VALUE
+    query_budget = 4
+    memory_budget = 2 * 1024 * 1024
 
     def get_queryset(self):
         return get_post_queryset(
@@ -32,6 +51,11 @@ class PostListView(ListView):
             annotate_comments=True
         )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(get_feed_context(context["page_obj"]))
+        return context
+
 
 class PostDetailView(DetailView):
     """Отображает детальную информацию о посте."""
@@ -40,30 +64,41 @@ class PostDetailView(DetailView):
     template_name = "blog/detail.html"
     pk_url_kwarg = "post_id"
     login_url = "login"
+    query_budget = 5
+    memory_budget = 2 * 1024 * 1024
 
     def get_object(self, queryset=None):
-        post = get_object_or_404(
-            get_post_queryset(),
-            pk=self.kwargs[self.pk_url_kwarg]
+        return get_visible_post(
+            self.kwargs[self.pk_url_kwarg], self.request.user
         )
-        is_author = post.author == self.request.user
-        if not is_author:
-            post = get_object_or_404(
-                get_post_queryset(filter_published=True),
-                pk=self.kwargs[self.pk_url_kwarg]
-            )
-        return post
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form"] = CommentForm()
-        context["comments"] = (
-            self.object.comments.select_related("author")
-            .order_by("created_at")
+        context["comments"], context["next_cursor"] = get_comment_page(
+            self.object, self.request.GET.get("after")
         )
         return context
 
 
+@query_budget(5)
+@memory_budget(2 * 1024 * 1024)
+@require_safe
+def post_comments(request, post_id):
+    """Отдаёт фрагмент со следующей страницей комментариев поста."""
+    post = get_visible_post(post_id, request.user)
+    comments, next_cursor = get_comment_page(post, request.GET.get("after"))
+    context = {
+        "post": post,
+        "comments": comments,
+        "next_cursor": next_cursor,
+        "fragment": True,
+    }
+    return render(request, "includes/comments.html", context)
+
+
+@query_budget(5)
+@memory_budget(2 * 1024 * 1024)
 @login_required
 def category_posts(request, category_slug):
     template = "blog/category.html"
@@ -80,10 +115,13 @@ def category_posts(request, category_slug):
     context = {
         "category": category,
         "page_obj": page_obj,
+        **get_feed_context(page_obj),
     }
     return render(request, template, context)
 
 
+@query_budget(5)
+@memory_budget(2 * 1024 * 1024)
 def profile_detail(request, username):
     template = "blog/profile.html"
     profile = get_object_or_404(User, username=username)
@@ -96,11 +134,116 @@ def profile_detail(request, username):
     context = {
         "profile": profile,
         "page_obj": page_obj,
-        "user": request.user
+        "user": request.user,
+        **get_feed_context(page_obj),
     }
     return render(request, template, context)
 
 
+def feed_fragment(request, posts):
+    """
+    Отдаёт следующую порцию карточек ленты после курсора из ?after=.
+
+    Для анонимных пользователей порция одинакова, поэтому она
+    кэшируется на сервере и разрешается к кэшированию прокси.
+    """
+    cursor = request.GET.get("after")
+    if decode_cursor(cursor) is None:
+        cursor = None
+    try:
+        page = int(request.GET.get("page", ""))
+    except ValueError:
+        page = None
+    if page is not None and page < 0:
+        page = None
+    anonymous = not request.user.is_authenticated
+    key = "blog.feed_fragment." + hashlib.md5(
+        f"{request.path}:{cursor}:{page}".encode()
+    ).hexdigest()
+    content = cache.get(key) if anonymous else None
+    if content is None:
+        posts, next_cursor = get_keyset_page(
+            posts, "pub_date", cursor, settings.PAGINATOR_VALUE,
+            descending=True
+        )
+        content = render_to_string("includes/post_cards.html", {
+            "posts": posts,
+            "next_cursor": next_cursor,
+            "next_page": None if page is None else page + 1,
+            "fragment_url": request.path,
+        }, request)
+        if anonymous:
+            cache.set(key, content, settings.FEED_FRAGMENT_CACHE_TIMEOUT)
+    response = HttpResponse(content)
+    if anonymous:
+        patch_cache_control(
+            response, public=True,
+            max_age=settings.FEED_FRAGMENT_CACHE_TIMEOUT
+        )
+    else:
+        patch_cache_control(response, private=True)
+    return response
+
+
+@query_budget(3)
+@memory_budget(2 * 1024 * 1024)
+@require_safe
+def index_fragment(request):
+    return feed_fragment(request, get_post_queryset(
+        filter_published=True,
+        annotate_comments=True
+    ))
+
+
+@query_budget(4)
+@memory_budget(2 * 1024 * 1024)
+@require_safe
+@login_required
+def category_fragment(request, category_slug):
+    category = get_object_or_404(
+        Category.objects.filter(slug=category_slug),
+        is_published=True,
+    )
+    return feed_fragment(request, get_post_queryset(
+        category.posts,
+        filter_published=True,
+        annotate_comments=True
+    ))
+
+
+@query_budget(4)
+@memory_budget(2 * 1024 * 1024)
+@require_safe
+def profile_fragment(request, username):
+    profile = get_object_or_404(User, username=username)
+    return feed_fragment(request, get_post_queryset(
+        profile.posts,
+        filter_published=request.user.username != username,
+        annotate_comments=True
+    ))
+
+
+@query_budget(4)
+@require_safe
+def post_image(request, post_id, preset):
+    """Отдаёт изображение поста, уменьшенное по пресету."""
+    if preset not in settings.IMAGE_PRESETS:
+        raise Http404
+    posts = Post.objects.exclude(image="")
+    post = get_object_or_404(posts, pk=post_id)
+    if post.author_id != request.user.id:
+        post = get_object_or_404(
+            get_post_queryset(posts, filter_published=True),
+            pk=post_id
+        )
+    try:
+        name = get_variant(post.image.name, preset)
+    except (FileNotFoundError, UnidentifiedImageError):
+        raise Http404
+    return serve_media(request, name)
+
+
+@query_budget(4)
 @login_required
 def edit_profile(request):
     form = UserForm(request.POST or None, instance=request.user)
@@ -120,6 +263,7 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     form_class = PostForm
     template_name = "blog/create.html"
     login_url = "login"
+    query_budget = 7
 
     def form_valid(self, form):
         form.instance.author = self.request.user
@@ -135,11 +279,13 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 class PostUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
     """Редактирует существующий пост."""
 
-    model = Post
+    # Автор нужен журналу изменений api при сохранении
+    queryset = Post.objects.select_related("author")
     form_class = PostForm
     template_name = "blog/create.html"
     login_url = "login"
     pk_url_kwarg = "post_id"
+    query_budget = 9
 
     def get_success_url(self):
         return reverse(
@@ -155,26 +301,32 @@ class PostDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
     template_name = "blog/post_form.html"
     login_url = "login"
     pk_url_kwarg = "post_id"
+    query_budget = 8
 
     def get_success_url(self):
         return reverse("blog:index")
 
 
-class CommentUpdateView(CommentUpdateMixin, UpdateView):
+class CommentUpdateView(FragmentMixin, CommentUpdateMixin, UpdateView):
     """Представление для обновления комментария."""
 
+    query_budget = 7
 
-class CommentDeleteView(CommentMixin, DeleteView):
+
+class CommentDeleteView(DeleteFragmentMixin, CommentMixin, DeleteView):
     """Удаление комментария."""
 
+    query_budget = 7
+
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(FragmentMixin, LoginRequiredMixin, CreateView):
     """Представление для создания нового комментария."""
 
     model = Comment
     form_class = CommentForm
     template_name = "blog/comment.html"
     login_url = "login"
+    query_budget = 6
 
     def form_valid(self, form):
         form.instance.author = self.request.user
@@ -197,6 +349,7 @@ class UserRegistrationView(CreateView):
     form_class = UserRegistrationForm
     template_name = "registration/registration_form.html"
     success_url = reverse_lazy("login")
+    query_budget = 4
 
 
 class MyLogoutView(LogoutView):
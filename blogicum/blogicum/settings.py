@@ -22,6 +22,26 @@ STATIC_DIR = BASE_DIR / 'static'
 # Количество постов на странице
 PAGINATOR_VALUE = 10
 
+# Время жизни в кэше подгружаемых порций ленты для анонимных
+# пользователей: на сервере и в заголовке Cache-Control, сек
+FEED_FRAGMENT_CACHE_TIMEOUT = 60
+
+# Количество комментариев на странице поста и в подгрузке «Показать ещё»
+COMMENTS_PAGE_SIZE = 50
+
+# JSON API: размер страницы по умолчанию и наибольший, время
+# кэширования ответов клиентами и прокси, сек
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_CACHE_MAX_AGE = 60
+# Наибольшее число постов в пакетном запросе /api/posts/batch/
+API_BATCH_MAX_IDS = 100
+# Задержка выдачи записей журнала изменений, сек: запись ещё не
+# зафиксированной транзакции не должна оказаться позади курсора клиента,
+# поэтому задержка должна превышать самую долгую транзакцию с записью
+# в журнал (см. api/changes.py)
+API_SYNC_DELAY = 2
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-z)84@yelspqqp%1v@nxwxjn=%i43sr0e!2t86xrz#6_9enyjy+'
 
@@ -42,19 +62,28 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
-    "debug_toolbar",
+    'api.apps.ApiConfig',
     "django_bootstrap5",
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.SamplingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.TrafficCaptureMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.MemoryBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -70,10 +99,60 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Сюда collectstatic складывает файлы с хешами в именах и их .gz/.br
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+# Сборка CSS (manage.py build_css): очищенный Bootstrap в static/css
+# и критический CSS, встраиваемый в base.html
+CSS_SOURCE = 'bootstrap.min.css'
+CSS_PURGED = 'bootstrap.purged.css'
+CSS_CRITICAL_INCLUDE = 'includes/critical_css.html'
+# Шаблоны первого экрана: их классы попадают в критический CSS
+CSS_CRITICAL_TEMPLATES = ['base.html', 'includes/header.html']
+# Приложения, чьи шаблоны тоже просматриваются в поисках классов
+CSS_TEMPLATE_APPS = ['django_bootstrap5']
+# Классы, которые django_bootstrap5 добавляет из Python при рендере
+# полей, кнопок и сообщений, — в его шаблонах их нет
+CSS_SAFELIST = [
+    'alert', 'alert-danger', 'alert-dismissible', 'alert-info',
+    'alert-success', 'alert-warning', 'btn', 'btn-close', 'btn-primary',
+    'fade', 'form-check', 'form-check-input', 'form-check-label',
+    'form-control', 'form-label', 'form-select', 'form-text',
+    'invalid-feedback', 'is-invalid', 'is-valid', 'mb-3', 'show',
+]
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Способ отдачи media: 'django' (FileResponse + sendfile у WSGI-сервера),
+# 'x-accel-redirect' (nginx) или 'x-sendfile' (Apache/lighttpd)
+MEDIA_SERVE_MODE = 'django'
+# internal-location nginx, из которого отдаются файлы MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+
+# Пресеты ресайза изображений постов: только они доступны по URL
+IMAGE_PRESETS = {
+    'thumb': {'size': (320, 320), 'format': 'webp'},
+    'card': {'size': (640, 640), 'format': 'jpeg'},
+    'preview': {'size': (1200, 630), 'format': 'jpeg'},
+}
+# Каталог кэша вариантов внутри MEDIA_ROOT и его предельный размер
+IMAGE_CACHE_DIR = 'resized'
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Каталог внутри MEDIA_ROOT для файлов, не привязанных ни к одному посту
+MEDIA_QUARANTINE_DIR = 'orphaned'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -159,7 +238,99 @@ LOGOUT_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 
 
-# Настройка debug toolbar
+# Сжатие ответов: тела короче порога не сжимаются; сжатые тела
+# анонимных страниц хранятся в кэше, чтобы не сжимать их повторно
+COMPRESSION_MIN_LENGTH = 200
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_TIMEOUT = 300
+
+
+# Адреса внутренней сети
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+
+# Метрики Prometheus: файлы процессов-воркеров (очищать при деплое),
+# период их записи и адреса, которым доступен /metrics/
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+
+# Server-Timing: всегда для персонала и для доли остальных запросов
+SERVER_TIMING_APPS = ['blog', 'pages']
+SERVER_TIMING_SAMPLE_RATE = 0.01
+
+# Доля запросов сверх бюджета SQL, которые пишутся в лог с повторами SQL
+QUERY_BUDGET_LOG_SAMPLE_RATE = 1.0
+
+# Доля запросов, у которых tracemalloc измеряет пик памяти
+MEMORY_SAMPLE_RATE = 0.001
+
+
+# Профилирование запросов персонала (X-Profile / ?_profile=):
+# период сэмплирования, строк отчёта cProfile, сколько профилей хранить
+PROFILING_ENABLED = True
+PROFILING_SAMPLE_INTERVAL = 0.001
+PROFILING_STATS_LIMIT = 60
+PROFILING_KEEP = 200
+
+
+# Постоянное сэмплирование стеков воркеров: период выборки, предельная
+# доля CPU на выборки, каталог файлов <pid>.folded и период их записи;
+# flamegraph — `manage.py collect_stacks | flamegraph.pl`
+SAMPLING_ENABLED = True
+SAMPLING_INTERVAL = 0.01
+SAMPLING_MAX_OVERHEAD = 0.01
+SAMPLING_DIR = BASE_DIR / 'stacks'
+SAMPLING_FLUSH_INTERVAL = 30
+
+
+# Журнал медленных SQL-запросов: порог в секундах (None — выключен)
+# и файл с ротацией; сводка — `manage.py slow_queries`
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG = BASE_DIR / 'logs' / 'slow_queries.log'
+
+# Обезличенная запись доли запросов для воспроизведения на копии базы
+# (`manage.py replay_traffic`); 0 — запись выключена
+TRAFFIC_CAPTURE_SAMPLE_RATE = 0.01
+TRAFFIC_CAPTURE_LOG = BASE_DIR / 'logs' / 'traffic.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'core.log.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'message',
+        },
+        'traffic': {
+            'class': 'core.log.RotatingFileHandler',
+            'filename': TRAFFIC_CAPTURE_LOG,
+            'maxBytes': 50 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.slowlog': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'core.traffic': {
+            'handlers': ['traffic'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -1,14 +1,15 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 
 from blog.views import UserRegistrationView, my_logout_then_login
+from core.views import metrics, serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("blog.urls", namespace="blog")),
     path("pages/", include("pages.urls")),
+    path("api/", include("api.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path(
         "auth/registration/",
@@ -16,11 +17,13 @@ urlpatterns = [
         name="registration"
     ),
     path("auth/logout/", my_logout_then_login, name="logout"),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path("metrics/", metrics, name="metrics"),
+    re_path(
+        r"^{}(?P<path>.*)$".format(settings.MEDIA_URL.lstrip("/")),
+        serve_media,
+        name="media"
+    ),
+]
 
 handler404 = "pages.views.page_not_found"
 handler500 = "pages.views.server_error"
-
-if settings.DEBUG:
-    import debug_toolbar
-    urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
@@ -0,0 +1,56 @@
+import django.contrib.admin as admin
+from django.utils.html import format_html, format_html_join
+
+from .models import Profile
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at', 'method', 'path', 'view', 'status', 'mode',
+        'duration_ms', 'queries'
+    )
+    list_filter = ('mode', 'view')
+    search_fields = ('path', 'view')
+    date_hierarchy = 'created_at'
+    fields = (
+        'created_at', 'user', 'method', 'path', 'view', 'status', 'mode',
+        'duration', 'queries', 'query_time', 'template_time',
+        'call_tree_display', 'templates_display', 'sql_display'
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Время, мс', ordering='duration')
+    def duration_ms(self, obj):
+        return round(obj.duration * 1000, 1)
+
+    @admin.display(description='Профиль вызовов')
+    def call_tree_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.call_tree)
+
+    @admin.display(description='SQL')
+    def sql_display(self, obj):
+        return format_html(
+            '<table>{}</table>',
+            format_html_join(
+                '', '<tr><td>{}</td><td><code>{}</code></td></tr>',
+                ((f'{duration:.1f}', sql) for sql, duration in obj.sql)
+            )
+        )
+
+    @admin.display(description='Шаблоны')
+    def templates_display(self, obj):
+        return format_html(
+            '<table>{}</table>',
+            format_html_join(
+                '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                ((template, parent or '—', count, f'{ms:.1f}')
+                 for template, parent, count, ms in obj.templates)
+            )
+        )
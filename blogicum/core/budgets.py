@@ -0,0 +1,55 @@
+"""Бюджеты SQL-запросов и памяти представлений."""
+from collections import Counter
+
+
+def query_budget(limit):
+    """
+    Объявляет бюджет SQL-запросов функции-представления.
+
+    У классов-представлений бюджет задаётся атрибутом `query_budget`.
+    Бюджет считает все запросы HTTP-запроса, включая сессию и
+    пользователя.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+
+    return decorator
+
+
+def memory_budget(limit):
+    """
+    Объявляет бюджет пиковой памяти функции-представления в байтах.
+
+    У классов-представлений бюджет задаётся атрибутом `memory_budget`.
+    Считается пик выделений Python за время обработки запроса.
+    """
+    def decorator(view):
+        view.memory_budget = limit
+        return view
+
+    return decorator
+
+
+def _get_budget(resolver_match, name):
+    if resolver_match is None:
+        return None
+    view = getattr(resolver_match.func, "view_class", resolver_match.func)
+    return getattr(view, name, None)
+
+
+def get_query_budget(resolver_match):
+    return _get_budget(resolver_match, "query_budget")
+
+
+def get_memory_budget(resolver_match):
+    return _get_budget(resolver_match, "memory_budget")
+
+
+def duplicate_queries(sql):
+    """Повторяющиеся тексты SQL по убыванию числа повторов."""
+    return [
+        (statement, count)
+        for statement, count in Counter(sql).most_common()
+        if count > 1
+    ]
@@ -0,0 +1,98 @@
+import gzip
+import zlib
+
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # без brotli доступен только gzip
+    brotli = None
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+# Уровни для ответов «на лету»: быстрее, чем максимальные уровни сборки
+DYNAMIC_BROTLI_QUALITY = 5
+DYNAMIC_GZIP_LEVEL = 6
+# Как в GZipMiddleware: случайное имя файла в заголовке gzip меняет
+# длину ответа, и по ней нельзя подобрать секрет из тела (BREACH)
+PADDING_MAX_BYTES = 100
+
+
+def supported_encodings():
+    """Кодировки в порядке предпочтения сервера."""
+    if brotli is None:
+        return (ENCODING_GZIP,)
+    return (ENCODING_BROTLI, ENCODING_GZIP)
+
+
+def compress(data, encoding, best=False):
+    """Сжимает байты целиком; `best` — максимальный уровень для сборки."""
+    if encoding == ENCODING_BROTLI:
+        quality = 11 if best else DYNAMIC_BROTLI_QUALITY
+        return brotli.compress(data, quality=quality)
+    level = 9 if best else DYNAMIC_GZIP_LEVEL
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class StreamCompressor:
+    """
+    Потоковый компрессор с flush после каждой части.
+
+    Клиент получает данные по мере генерации ответа, а не после
+    его окончания.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == ENCODING_BROTLI:
+            self._compressor = brotli.Compressor(
+                quality=DYNAMIC_BROTLI_QUALITY
+            )
+        else:
+            self._compressor = zlib.compressobj(
+                DYNAMIC_GZIP_LEVEL, zlib.DEFLATED, 31
+            )
+
+    def compress(self, chunk):
+        if self.encoding == ENCODING_BROTLI:
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return (
+            self._compressor.compress(chunk)
+            + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        )
+
+    def finish(self):
+        if self.encoding == ENCODING_BROTLI:
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    async for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.finish()
+
+
+def compress_padded(data):
+    """Сжимает gzip со случайным дополнением длины."""
+    return compress_string(data, max_random_bytes=PADDING_MAX_BYTES)
+
+
+def compress_stream_padded(chunks):
+    return compress_sequence(chunks, max_random_bytes=PADDING_MAX_BYTES)
+
+
+async def acompress_stream_padded(chunks):
+    # Каждая часть — отдельный gzip-член со своим дополнением
+    async for chunk in chunks:
+        yield compress_padded(chunk)
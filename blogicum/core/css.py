@@ -0,0 +1,152 @@
+"""Минимальный разбор CSS для очистки Bootstrap от неиспользуемых правил."""
+import re
+from pathlib import Path
+
+CLASS_ATTR_RE = re.compile(r"""class\s*=\s*(["'])(.*?)\1""", re.S)
+TEMPLATE_TAG_RE = re.compile(r"{%.*?%}|{{.*?}}|{#.*?#}", re.S)
+CLASS_NAME_RE = re.compile(r"^-?[_a-zA-Z][\w-]*$")
+SELECTOR_CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+# At-правила, внутри которых лежат обычные правила
+GROUPING_AT_RULES = ("@media", "@supports")
+
+
+def used_classes(paths):
+    """
+    Собирает имена классов из атрибутов class="..." шаблонов.
+
+    Теги и переменные шаблона внутри атрибута выбрасываются,
+    а литералы из веток {% if %} остаются.
+    """
+    classes = set()
+    for path in paths:
+        source = Path(path).read_text(encoding="utf-8")
+        for _, value in CLASS_ATTR_RE.findall(source):
+            for token in TEMPLATE_TAG_RE.sub(" ", value).split():
+                if CLASS_NAME_RE.match(token):
+                    classes.add(token)
+    return classes
+
+
+def _skip_string(css, i):
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == "\\" else 1
+    return i + 1
+
+
+def parse(css, i=0):
+    """
+    Разбирает CSS в список узлов до закрывающей скобки блока.
+
+    Узел — кортеж (prelude, body), где body — строка объявлений
+    для обычного правила, список узлов для @media/@supports и
+    None для at-правил без блока (@charset, @import). Комментарии
+    отбрасываются.
+
+    Возвращает:
+        tuple: Список узлов и позиция после закрывающей скобки
+    """
+    nodes = []
+    start = i
+    while i < len(css):
+        char = css[i]
+        if css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = len(css) if end == -1 else end + 2
+            start = i
+            continue
+        if char in "\"'":
+            i = _skip_string(css, i)
+        elif char == ";":
+            nodes.append((css[start:i].strip(), None))
+            i += 1
+            start = i
+        elif char == "}":
+            return nodes, i + 1
+        elif char == "{":
+            prelude = css[start:i].strip()
+            if prelude.startswith(GROUPING_AT_RULES):
+                body, i = parse(css, i + 1)
+            else:
+                body_start = i + 1
+                depth = 1
+                i += 1
+                while depth:
+                    if css[i] in "\"'":
+                        i = _skip_string(css, i)
+                        continue
+                    depth += {"{": 1, "}": -1}.get(css[i], 0)
+                    i += 1
+                body = css[body_start:i - 1]
+            nodes.append((prelude, body))
+            start = i
+        else:
+            i += 1
+    return nodes, i
+
+
+def split_selectors(prelude):
+    """Делит список селекторов по запятым вне скобок :not(...)/:is(...)."""
+    selectors = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(prelude):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and not depth:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _selector_used(selector, classes):
+    return set(SELECTOR_CLASS_RE.findall(selector)) <= classes
+
+
+def purge(nodes, classes, keep_elements=True):
+    """
+    Оставляет правила, все классы селекторов которых используются.
+
+    Аргументы:
+        nodes: Узлы из `parse`
+        classes: Множество используемых классов
+        keep_elements: Оставлять ли правила без классов
+            (reboot, :root с CSS-переменными)
+    """
+    result = []
+    for prelude, body in nodes:
+        if prelude.startswith("@charset"):
+            # Вне начала файла и внутри <style> @charset недопустим
+            continue
+        if body is None or prelude.startswith("@"):
+            if isinstance(body, list):
+                body = purge(body, classes, keep_elements)
+                if body:
+                    result.append((prelude, body))
+            elif keep_elements:
+                result.append((prelude, body))
+            continue
+        selectors = [
+            selector for selector in split_selectors(prelude)
+            if _selector_used(selector, classes)
+            and (keep_elements or SELECTOR_CLASS_RE.search(selector))
+        ]
+        if selectors:
+            result.append((",".join(selectors), body))
+    return result
+
+
+def serialize(nodes):
+    parts = []
+    for prelude, body in nodes:
+        if body is None:
+            parts.append(f"{prelude};")
+        elif isinstance(body, list):
+            parts.append(f"{prelude}{{{serialize(body)}}}")
+        else:
+            parts.append(f"{prelude}{{{body}}}")
+    return "".join(parts)
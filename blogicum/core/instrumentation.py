@@ -0,0 +1,204 @@
+"""
+Сбор показателей текущего запроса: SQL, рендер шаблонов, кэш.
+
+Рендер считается дважды: общее время внешнего рендера и время
+каждого шаблона и {% include %} отдельно, с включившим его шаблоном.
+
+Обёртка SQL ставится один раз на каждое соединение с БД, обёртки
+рендера и кэша — один раз на класс. Вне запроса, когда статистика
+не начата, обёртки ничего не считают; медленные SQL пишутся в журнал
+и тогда.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+_current = ContextVar("request_stats", default=None)
+_MISSING = object()
+
+
+class RequestStats:
+    """Показатели одного HTTP-запроса."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.started = perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        # Тексты SQL без параметров: одинаковые строки — кандидаты в N+1
+        self.sql = []
+        # Длительности тех же запросов в секундах, по порядку
+        self.query_durations = []
+        self.template_time = 0.0
+        # (шаблон, включивший его шаблон или "") -> [рендеров, секунд];
+        # время включает вложенные include
+        self.templates = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self._template_depth = 0
+        self._template_stack = []
+
+    @property
+    def elapsed(self):
+        return perf_counter() - self.started
+
+
+def start_request(request=None):
+    """Начинает сбор показателей; возвращает токен для `finish_request`."""
+    stats = RequestStats(request)
+    return stats, _current.set(stats)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextmanager
+def collect_stats(request=None):
+    """
+    Отдаёт показатели текущего запроса.
+
+    Если сбор уже начат middleware выше по цепочке, используются его
+    показатели, иначе сбор начинается здесь.
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.request = stats.request or request
+        yield stats
+        return
+    stats, token = start_request(request)
+    try:
+        yield stats
+    finally:
+        finish_request(token)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if stats is None and not threshold:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - start
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += duration
+            stats.sql.append(sql)
+            stats.query_durations.append(duration)
+    if threshold and duration >= threshold and not many:
+        _log_slow_query(context["connection"], sql, params, duration, stats)
+    return result
+
+
+def _log_slow_query(connection, sql, params, duration, stats):
+    from .slowlog import log_slow_query
+    from .utils import view_name
+
+    if stats is None:
+        view = "<outside request>"
+    elif stats.request is None:
+        view = "<unresolved>"
+    else:
+        view = view_name(stats.request)
+    log_slow_query(connection, sql, params, duration, view)
+
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def _instrument_template_render(template_class):
+    original_render = template_class.render
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        # Вложенные рендеры (include, формы) уже входят во внешний
+        if stats is None or stats._template_depth:
+            return original_render(self, context, request)
+        stats._template_depth += 1
+        start = perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            stats._template_depth -= 1
+            stats.template_time += perf_counter() - start
+
+    template_class.render = render
+
+
+def _instrument_template_includes(template_class):
+    original_render = template_class.render
+
+    def render(self, context):
+        stats = _current.get()
+        if stats is None:
+            return original_render(self, context)
+        stack = stats._template_stack
+        name = self.name or "<string>"
+        key = (name, stack[-1] if stack else "")
+        stack.append(name)
+        start = perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            stack.pop()
+            entry = stats.templates.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += perf_counter() - start
+
+    template_class.render = render
+
+
+def _instrument_cache_get(cache_class):
+    original_get = cache_class.get
+
+    def get(self, key, default=None, version=None):
+        stats = _current.get()
+        if stats is None:
+            return original_get(self, key, default, version)
+        start = perf_counter()
+        value = original_get(self, key, _MISSING, version)
+        stats.cache_time += perf_counter() - start
+        if value is _MISSING:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+
+    cache_class.get = get
+
+
+def _instrument_once(cls, method_name, instrument):
+    if not getattr(getattr(cls, method_name), "_instrumented", False):
+        instrument(cls)
+        getattr(cls, method_name)._instrumented = True
+
+
+def install():
+    """Подключает сбор показателей; вызывается из CoreConfig.ready()."""
+    from django.core.cache import caches
+    from django.template import base
+    from django.template.backends.django import Template
+
+    connection_created.connect(
+        _install_db_wrapper, dispatch_uid="core.instrumentation"
+    )
+    _instrument_once(Template, "render", _instrument_template_render)
+    # Не _render: его подменяет тестовое окружение Django
+    _instrument_once(base.Template, "render", _instrument_template_includes)
+    for alias in settings.CACHES:
+        _instrument_once(
+            type(caches[alias]), "get", _instrument_cache_get
+        )
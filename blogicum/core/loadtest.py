@@ -0,0 +1,231 @@
+"""
+Нагрузка на проект внутри процесса, напрямую через WSGI.
+
+Сеть и веб-сервер не участвуют: измеряется стек Django — middleware,
+представления, ORM и шаблоны. Потоки делят GIL, поэтому пропускная
+способность соответствует одному процессу-воркеру с потоками.
+"""
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+PERCENTILES = (50, 95, 99)
+UNRESOLVED = "<unresolved>"
+
+
+class WSGIClient:
+    """HTTP-клиент поверх WSGI-приложения, хранящий cookie между запросами."""
+
+    def __init__(self, app=None, host="localhost"):
+        self.app = app or WSGIHandler()
+        self.host = host
+        self.cookies = SimpleCookie()
+
+    def environ(self, method, path, body, headers):
+        path, _, query = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_LENGTH": str(len(body)),
+            "CONTENT_TYPE": "application/x-www-form-urlencoded",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        cookie = "; ".join(
+            f"{name}={morsel.value}" for name, morsel in self.cookies.items()
+        )
+        if cookie:
+            environ["HTTP_COOKIE"] = cookie
+        for name, value in (headers or {}).items():
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+        return environ
+
+    def request(self, method, path, data=None, headers=None, body=None):
+        """
+        Выполняет запрос и читает тело ответа целиком.
+
+        Возвращает:
+            tuple: Код статуса, список заголовков и тело ответа
+        """
+        if body is None:
+            body = urlencode(data or {}, doseq=True).encode()
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = response_headers
+
+        result = self.app(
+            self.environ(method, path, body, headers), start_response
+        )
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        for name, value in started["headers"]:
+            if name.lower() == "set-cookie":
+                self.cookies.load(value)
+        return started["status"], started["headers"], content
+
+
+def switch_database(path):
+    """Переключает соединение default всех потоков на другой файл SQLite."""
+    connections["default"].close()
+    connections.settings["default"]["NAME"] = path
+
+
+def sample(queryset, size, rng):
+    """
+    Воспроизводимая выборка значений из queryset.
+
+    ORDER BY RANDOM() не зависит от зерна, поэтому значения читаются
+    в порядке первичного ключа и выбираются генератором `rng`.
+    """
+    values = list(queryset.order_by("pk"))
+    return rng.sample(values, min(size, len(values)))
+
+
+def url_name(path):
+    try:
+        return resolve(path.partition("?")[0]).view_name
+    except Resolver404:
+        return UNRESOLVED
+
+
+def percentile(sorted_values, percent):
+    """Процентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def summarize(records, elapsed):
+    """
+    Сводка по именам URL: число запросов, ошибки, запросов в секунду
+    и процентили задержки в миллисекундах.
+    """
+    groups = defaultdict(list)
+    for name, latency, status in records:
+        groups[name].append((latency, status))
+        groups["total"].append((latency, status))
+    summary = {}
+    for name, samples in sorted(groups.items()):
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        summary[name] = {
+            "requests": len(samples),
+            "errors": sum(status >= 400 for _, status in samples),
+            "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            **{
+                f"p{percent}_ms": round(percentile(latencies, percent), 3)
+                for percent in PERCENTILES
+            },
+        }
+    return summary
+
+
+def run(scenarios, concurrency, duration=None, requests=None, seed=0,
+        setup=None):
+    """
+    Гоняет сценарии в `concurrency` потоках.
+
+    Аргументы:
+        scenarios: Пары (вес, сценарий); сценарий получает клиент и
+            генератор случайных чисел потока и возвращает
+            (метод, путь, данные формы)
+        duration: Длительность в секундах
+        requests: Либо общее число запросов
+        setup: Вызывается с клиентом и генератором один раз на поток,
+            например для входа на сайт
+
+    Возвращает:
+        tuple: Записи (имя URL, задержка в секундах, статус) и
+            длительность прогона
+    """
+    weights = [weight for weight, _ in scenarios]
+    actions = [action for _, action in scenarios]
+    records = []
+    lock = threading.Lock()
+    budget = iter(range(requests)) if requests else None
+    deadline = time.perf_counter() + duration if duration else None
+    app = WSGIHandler()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = WSGIClient(app)
+        if setup is not None:
+            setup(client, rng)
+        local = []
+        while True:
+            if budget is not None and next(budget, None) is None:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            method, path, data = rng.choices(actions, weights)[0](
+                client, rng
+            )
+            start = time.perf_counter()
+            status, _, _ = client.request(method, path, data)
+            local.append((url_name(path), time.perf_counter() - start,
+                          status))
+        connections.close_all()
+        with lock:
+            records.extend(local)
+
+    threads = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - started
+
+
+def compare(summary, baseline, tolerance, metric="p95_ms"):
+    """
+    Находит регрессии относительно базового прогона.
+
+    Возвращает:
+        dict: Имя URL -> (было, стало) для тех, у кого `metric` хуже
+            базового больше чем на долю `tolerance`
+    """
+    return {
+        name: (baseline[name][metric], stats[metric])
+        for name, stats in summary.items()
+        if name in baseline
+        and stats[metric] > baseline[name][metric] * (1 + tolerance)
+    }
+
+
+def save(path, summary, meta):
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(
+            {"meta": meta, "results": summary}, output,
+            ensure_ascii=False, indent=2,
+        )
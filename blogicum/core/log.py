@@ -0,0 +1,31 @@
+import json
+import logging.handlers
+from pathlib import Path
+
+
+class RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler, создающий каталог файла при первой записи."""
+
+    def __init__(self, filename, *args, **kwargs):
+        kwargs["delay"] = True
+        super().__init__(filename, *args, **kwargs)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+def read_json_lines(path):
+    """
+    Читает журнал из строк JSON вместе с ротированными копиями .1, .2, ...
+
+    Копии читаются от старых к новым; повреждённые строки пропускаются.
+    """
+    path = Path(path)
+    for log in sorted(path.parent.glob(path.name + "*"), reverse=True):
+        with open(log, encoding="utf-8") as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
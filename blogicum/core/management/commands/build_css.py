@@ -0,0 +1,51 @@
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.css import parse, purge, serialize, used_classes
+
+BANNER_RE = re.compile(r"/\*!.*?\*/", re.S)
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает из bootstrap.min.css очищенную таблицу стилей по классам"
+        " из шаблонов и встраиваемый критический CSS для base.html."
+    )
+
+    def handle(self, *args, **options):
+        css_dir = settings.STATIC_DIR / "css"
+        source = (css_dir / settings.CSS_SOURCE).read_text(encoding="utf-8")
+        nodes, _ = parse(source)
+        safelist = set(settings.CSS_SAFELIST)
+
+        templates = sorted(settings.TEMPLATES_DIR.rglob("*.html"))
+        for label in settings.CSS_TEMPLATE_APPS:
+            app_templates = Path(apps.get_app_config(label).path) / (
+                "templates"
+            )
+            templates += sorted(app_templates.rglob("*.html"))
+        classes = used_classes(templates) | safelist
+        banner = BANNER_RE.search(source)
+        purged = serialize(purge(nodes, classes))
+        (css_dir / settings.CSS_PURGED).write_text(
+            (banner.group() + "\n" if banner else "") + purged,
+            encoding="utf-8",
+        )
+
+        critical_classes = used_classes(
+            settings.TEMPLATES_DIR / name
+            for name in settings.CSS_CRITICAL_TEMPLATES
+        )
+        critical = serialize(purge(nodes, critical_classes))
+        (settings.TEMPLATES_DIR / settings.CSS_CRITICAL_INCLUDE).write_text(
+            "{% verbatim %}<style>" + critical + "</style>{% endverbatim %}\n",
+            encoding="utf-8",
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{settings.CSS_SOURCE}: {len(source)} байт, очищенный:"
+            f" {len(purged)} байт, критический: {len(critical)} байт"
+        ))
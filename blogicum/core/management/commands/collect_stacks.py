@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import read_folded
+
+
+class Command(BaseCommand):
+    help = (
+        "Сводит свёрнутые стеки постоянного сэмплера всех воркеров"
+        " в один файл для flamegraph.pl или speedscope."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--route", action="append", default=[],
+            help="Оставить только стеки этого представления, например"
+                 " blog:profile; можно указать несколько раз.",
+        )
+        parser.add_argument(
+            "--no-route-frame", action="store_true",
+            help="Убрать имя представления из корня стека.",
+        )
+        parser.add_argument(
+            "--output", help="Файл результата вместо stdout.",
+        )
+
+    def handle(self, *args, **options):
+        routes = set(options["route"])
+        lines = []
+        for stack, count in sorted(read_folded(settings.SAMPLING_DIR).items()):
+            route, _, frames = stack.partition(";")
+            if routes and route not in routes:
+                continue
+            if options["no_route_frame"]:
+                stack = frames
+            lines.append(f"{stack} {count}\n")
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            self.stdout.write("".join(lines), ending="")
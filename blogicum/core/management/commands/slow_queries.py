@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.log import read_json_lines
+from core.slowlog import aggregate
+
+SORT_KEYS = ("total", "count", "max", "mean")
+
+
+class Command(BaseCommand):
+    help = (
+        "Сводка журнала медленных SQL-запросов: самые дорогие отпечатки"
+        " с планами выполнения, представлениями и местом вызова."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file", default=settings.SLOW_QUERY_LOG,
+            help="Файл журнала (ротированные копии читаются тоже).",
+        )
+        parser.add_argument(
+            "--sort", choices=SORT_KEYS, default="total",
+            help="Поле сортировки, по умолчанию суммарное время.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=10,
+            help="Сколько отпечатков показать.",
+        )
+
+    def handle(self, *args, **options):
+        groups = aggregate(read_json_lines(options["file"]))
+        key = f"{options['sort']}_ms" if options["sort"] != "count" else (
+            "count"
+        )
+        groups.sort(key=lambda group: group[key], reverse=True)
+        if not groups:
+            self.stdout.write("Медленных запросов нет.")
+        for group in groups[:options["top"]]:
+            self.stdout.write(self.style.WARNING(
+                f"{group['fingerprint']}: {group['count']} раз,"
+                f" всего {group['total_ms']:.1f} мс,"
+                f" среднее {group['mean_ms']:.1f} мс,"
+                f" максимум {group['max_ms']:.1f} мс"
+            ))
+            self.stdout.write(f"  {group['sql']}")
+            for line in group["plan"]:
+                self.stdout.write(f"  план: {line}")
+            views = ", ".join(
+                f"{view} ({count})" for view, count
+                in sorted(group["views"].items(), key=lambda item: -item[1])
+            )
+            self.stdout.write(f"  представления: {views}")
+            for frame in group["origin"]:
+                self.stdout.write(f"  вызов: {frame}")
@@ -0,0 +1,49 @@
+"""
+Пиковая память запроса по данным tracemalloc.
+
+Трассировка замедляет весь процесс в разы, поэтому включается только
+на время выбранного запроса и только для одного запроса за раз.
+tracemalloc видит выделения всех потоков: в многопоточном воркере
+к пику запроса добавляются выделения соседних.
+"""
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+
+
+class PeakMemory:
+    """Пик выделений в байтах; None, если измерение не состоялось."""
+
+    peak = None
+
+
+@contextmanager
+def measure_peak():
+    """
+    Измеряет пик выделений памяти внутри блока.
+
+    Если другой запрос уже измеряется, блок выполняется без измерения.
+    Если трассировку включили снаружи (python -X tracemalloc), она
+    не выключается, а пик считается от уровня на входе.
+    """
+    result = PeakMemory()
+    if not _lock.acquire(blocking=False):
+        yield result
+        return
+    try:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        try:
+            yield result
+        finally:
+            result.peak = tracemalloc.get_traced_memory()[1] - base
+            if started_here:
+                tracemalloc.stop()
+    finally:
+        _lock.release()
@@ -0,0 +1,192 @@
+"""
+Метрики в формате Prometheus, общие для всех процессов-воркеров.
+
+Каждый процесс копит значения в памяти и раз в
+METRICS_FLUSH_INTERVAL секунд сбрасывает их в собственный файл
+METRICS_DIR/<pid>.json. Эндпоинт /metrics суммирует файлы всех
+процессов, поэтому счётчики не сбрасываются при перезапуске воркера.
+Каталог стоит очищать при деплое.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+MEMORY_BUCKETS = tuple(2 ** power for power in range(16, 28, 2))
+
+# Имя метрики -> (тип, описание, границы корзин гистограммы)
+METRICS = {
+    "blogicum_requests_total": (
+        "counter", "Число запросов по представлению и статусу.", None
+    ),
+    "blogicum_request_duration_seconds": (
+        "histogram", "Время обработки запроса.", LATENCY_BUCKETS
+    ),
+    "blogicum_db_queries": (
+        "histogram", "SQL-запросов за HTTP-запрос.", QUERY_COUNT_BUCKETS
+    ),
+    "blogicum_db_query_seconds_total": (
+        "counter", "Суммарное время SQL-запросов.", None
+    ),
+    "blogicum_template_render_seconds_total": (
+        "counter", "Суммарное время рендера шаблонов.", None
+    ),
+    "blogicum_template_renders_total": (
+        "counter", "Рендеров шаблона по имени и включившему шаблону.", None
+    ),
+    "blogicum_template_seconds_total": (
+        "counter",
+        "Время рендера шаблона вместе с вложенными include.",
+        None,
+    ),
+    "blogicum_query_budget_exceeded_total": (
+        "counter", "Запросов сверх бюджета SQL представления.", None
+    ),
+    "blogicum_request_peak_memory_bytes": (
+        "histogram",
+        "Пик выделений памяти за запрос (выборка запросов).",
+        MEMORY_BUCKETS,
+    ),
+    "blogicum_memory_budget_exceeded_total": (
+        "counter", "Запросов сверх бюджета памяти представления.", None
+    ),
+    "blogicum_response_size_bytes": (
+        "histogram", "Размер тела ответа.", SIZE_BUCKETS
+    ),
+}
+
+
+class Registry:
+    """Значения метрик текущего процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        # (имя, метки) -> [счётчики корзин..., сумма, количество]
+        self._histograms = {}
+        self._flushed_at = time.monotonic()
+
+    def inc(self, name, labels, value=1.0):
+        with self._lock:
+            self._counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[name, labels] = (
+                    [0] * (len(buckets) + 3)
+                )
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(values)]
+                    for (name, labels), values in self._histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Сбрасывает значения в файл процесса не чаще раза в интервал."""
+        now = time.monotonic()
+        if not force and now - self._flushed_at < (
+            settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self._flushed_at = now
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+registry = Registry()
+atexit.register(registry.flush, force=True)
+
+
+def collect():
+    """Суммирует значения метрик из файлов всех процессов."""
+    registry.flush(force=True)
+    counters = defaultdict(float)
+    histograms = {}
+    for path in Path(settings.METRICS_DIR).glob("*.json"):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data["counters"]:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, values in data["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [
+                    a + b for a, b in zip(histograms[key], values)
+                ]
+            else:
+                histograms[key] = values
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(
+            key,
+            str(value).replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus(counters, histograms):
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), values):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket"
+                    f"{_format_labels(labels, [('le', bound)])} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]}")
+            lines.append(
+                f"{name}_count{_format_labels(labels)} {values[-1]}"
+            )
+    return "\n".join(lines) + "\n"
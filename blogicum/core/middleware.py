@@ -0,0 +1,501 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import random
+import threading
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+
+from .budgets import duplicate_queries, get_memory_budget, get_query_budget
+from .compression import (
+    ENCODING_GZIP, acompress_stream, acompress_stream_padded, compress,
+    compress_padded, compress_stream, compress_stream_padded,
+    supported_encodings
+)
+from .instrumentation import collect_stats
+from .memory import measure_peak
+from .metrics import registry
+from .models import Profile
+from .profiling import MODE_CPROFILE, PROFILERS, get_sampler
+from .traffic import capture
+from .utils import accepted_encodings, file_etag, not_modified, view_name
+
+# Порядок предпочтения предсжатых вариантов
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+logger = logging.getLogger(__name__)
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+# Помимо text/* сжимаются только эти типы: изображения и архивы
+# уже сжаты, повторное сжатие тратит CPU впустую
+COMPRESSIBLE_CONTENT_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/rss+xml",
+    "application/atom+xml",
+    "image/svg+xml",
+}
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную статику с хешами в именах до остальных middleware.
+
+    Индекс файлов и их .br/.gz-вариантов строится один раз при старте
+    по манифесту collectstatic; без манифеста middleware отключается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        if not self.prefix.startswith("/"):
+            raise MiddlewareNotUsed
+        self.files = self.build_index()
+        if not self.files:
+            raise MiddlewareNotUsed
+
+    @staticmethod
+    def build_index():
+        hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+        files = {}
+        for name in set(hashed_files.values()):
+            path = staticfiles_storage.path(name)
+            if not os.path.isfile(path):
+                continue
+            variants = [
+                (encoding, path + suffix)
+                for encoding, suffix in STATIC_ENCODINGS
+                if os.path.isfile(path + suffix)
+            ]
+            content_type, _ = mimetypes.guess_type(name)
+            files[name] = (
+                path, variants, content_type or "application/octet-stream"
+            )
+        return files
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and (
+            request.path_info.startswith(self.prefix)
+        ):
+            entry = self.files.get(request.path_info[len(self.prefix):])
+            if entry is not None:
+                return self.serve(request, *entry)
+        return self.get_response(request)
+
+    @staticmethod
+    def serve(request, path, variants, content_type):
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING"))
+        encoding = None
+        for variant_encoding, variant_path in variants:
+            if variant_encoding in accepted:
+                encoding, path = variant_encoding, variant_path
+                break
+        statobj = os.stat(path)
+        etag = file_etag(statobj)
+        if not_modified(request, etag, statobj.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(path, "rb"), content_type=content_type
+            )
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        if variants:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Сжимает текстовые ответы brotli или gzip по Accept-Encoding.
+
+    Потоковые ответы сжимаются по частям. Одинаковые тела анонимных
+    страниц сжимаются один раз: результат хранится в кэше по хешу
+    тела. Кэш страниц, подключённый выше этого middleware, сохраняет
+    уже сжатый ответ с Vary: Accept-Encoding.
+
+    Ответы с секретами (сессия, CSRF-токен) сжимаются только gzip со
+    случайным дополнением длины, как в GZipMiddleware Django, — защита
+    от BREACH.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        padded = self.has_secrets(request, response)
+        encoding = self.negotiate(request, padded)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            content = response.streaming_content
+            if response.is_async:
+                response.streaming_content = (
+                    acompress_stream_padded(content) if padded
+                    else acompress_stream(content, encoding)
+                )
+            else:
+                response.streaming_content = (
+                    compress_stream_padded(content) if padded
+                    else compress_stream(content, encoding)
+                )
+            del response.headers["Content-Length"]
+        else:
+            content = response.content
+            if padded:
+                compressed = compress_padded(content)
+            else:
+                compressed = self.compress_cached(content, encoding)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        if etag := response.get("ETag"):
+            if etag.startswith('"'):
+                response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def is_compressible(response):
+        if response.status_code != 200 or response.has_header(
+            "Content-Encoding"
+        ):
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0]
+        return content_type.startswith("text/") or (
+            content_type in COMPRESSIBLE_CONTENT_TYPES
+        )
+
+    @staticmethod
+    def negotiate(request, padded=False):
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING"))
+        encodings = (ENCODING_GZIP,) if padded else supported_encodings()
+        for encoding in encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    @staticmethod
+    def has_secrets(request, response):
+        """
+        Ответ может содержать секреты: есть сессия, cookies или CSRF-токен.
+
+        Остальные ответы одинаковы для всех анонимов, их сжатие кэшируется.
+        """
+        return bool(
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or response.cookies
+            or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        )
+
+    @staticmethod
+    def compress_cached(content, encoding):
+        cache = caches[settings.COMPRESSION_CACHE_ALIAS]
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        key = f"compressed:{encoding}:{digest}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(content, encoding)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
+
+
+class MetricsMiddleware:
+    """
+    Пишет метрики запроса: время, SQL, рендер шаблонов, размер ответа.
+
+    На запрос приходится несколько обновлений словарей в памяти;
+    запись в файл процесса — не чаще METRICS_FLUSH_INTERVAL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_stats(request) as stats:
+            response = self.get_response(request)
+        self.record(request, response, stats)
+        return response
+
+    @staticmethod
+    def record(request, response, stats):
+        view = (("view", view_name(request)),)
+        method = request.method if request.method in KNOWN_METHODS else (
+            "other"
+        )
+        registry.inc(
+            "blogicum_requests_total",
+            view + (("method", method), ("status", response.status_code)),
+        )
+        registry.observe(
+            "blogicum_request_duration_seconds", view, stats.elapsed
+        )
+        registry.observe("blogicum_db_queries", view, stats.queries)
+        registry.inc("blogicum_db_query_seconds_total", view, stats.query_time)
+        registry.inc(
+            "blogicum_template_render_seconds_total", view, stats.template_time
+        )
+        for (template, parent), (count, seconds) in stats.templates.items():
+            labels = (("template", template), ("parent", parent))
+            registry.inc("blogicum_template_renders_total", labels, count)
+            registry.inc("blogicum_template_seconds_total", labels, seconds)
+        if not response.streaming:
+            registry.observe(
+                "blogicum_response_size_bytes", view, len(response.content)
+            )
+        registry.flush()
+
+
+class ServerTimingMiddleware:
+    """
+    Добавляет заголовок Server-Timing с разбивкой времени ответа.
+
+    Включается для персонала и для доли SERVER_TIMING_SAMPLE_RATE
+    остальных запросов, только для представлений приложений из
+    SERVER_TIMING_APPS. Ставится после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.apps = set(settings.SERVER_TIMING_APPS)
+
+    def __call__(self, request):
+        with collect_stats(request) as stats:
+            response = self.get_response(request)
+            if self.is_enabled(request):
+                response.headers["Server-Timing"] = self.header(stats)
+        return response
+
+    def is_enabled(self, request):
+        match = request.resolver_match
+        if match is None or not self.apps.intersection(match.app_names):
+            return False
+        return request.user.is_staff or (
+            random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+        )
+
+    @staticmethod
+    def header(stats):
+        def ms(seconds):
+            return f"{seconds * 1000:.1f}"
+
+        return ", ".join((
+            f'db;dur={ms(stats.query_time)};desc="{stats.queries} SQL"',
+            f"tpl;dur={ms(stats.template_time)}",
+            f'cache;dur={ms(stats.cache_time)};'
+            f'desc="hit {stats.cache_hits}, miss {stats.cache_misses}"',
+            f"total;dur={ms(stats.elapsed)}",
+        ))
+
+
+class QueryBudgetMiddleware:
+    """
+    Сообщает о запросах, превысивших бюджет SQL своего представления.
+
+    Каждое превышение считается в метрике, а доля
+    QUERY_BUDGET_LOG_SAMPLE_RATE пишется в лог вместе с
+    повторяющимися SQL — обычно это и есть N+1.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_stats(request) as stats:
+            response = self.get_response(request)
+        budget = get_query_budget(request.resolver_match)
+        if budget is None or stats.queries <= budget:
+            return response
+        view = view_name(request)
+        registry.inc("blogicum_query_budget_exceeded_total", (("view", view),))
+        if random.random() < settings.QUERY_BUDGET_LOG_SAMPLE_RATE:
+            duplicates = "\n".join(
+                f"  {count} x {sql}"
+                for sql, count in duplicate_queries(stats.sql)
+            )
+            logger.warning(
+                "%s %s: %d SQL-запросов при бюджете %d (%s)\n%s",
+                request.method, request.get_full_path(), stats.queries,
+                budget, view, duplicates or "  повторов нет",
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос персонала с заголовком X-Profile или
+    параметром ?_profile=.
+
+    Значение выбирает режим: sample — сэмплирование, иначе cProfile.
+    Профиль с деревом вызовов, SQL и временем шаблонов сохраняется
+    в модель Profile, ссылка на него в админке возвращается в заголовке
+    X-Profile-URL.
+    Ставится после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        with collect_stats(request) as stats:
+            queries_before = stats.queries
+            with PROFILERS[mode]() as profiler:
+                response = self.get_response(request)
+            profile = self.save(request, response, stats, queries_before,
+                                mode, profiler.report())
+        response.headers["X-Profile-URL"] = reverse(
+            "admin:core_profile_change", args=(profile.pk,)
+        )
+        return response
+
+    @staticmethod
+    def requested_mode(request):
+        value = request.headers.get("X-Profile") or request.GET.get(
+            "_profile"
+        )
+        if not value or not request.user.is_staff:
+            return None
+        return value if value in PROFILERS else MODE_CPROFILE
+
+    @staticmethod
+    def save(request, response, stats, queries_before, mode, call_tree):
+        queries = list(zip(
+            stats.sql[queries_before:],
+            (round(duration * 1000, 3)
+             for duration in stats.query_durations[queries_before:]),
+        ))
+        profile = Profile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            view=view_name(request),
+            status=response.status_code,
+            mode=mode,
+            duration=stats.elapsed,
+            queries=len(queries),
+            query_time=sum(duration for _, duration in queries) / 1000,
+            template_time=stats.template_time,
+            call_tree=call_tree,
+            sql=queries,
+            templates=sorted(
+                ([template, parent, count, round(seconds * 1000, 3)]
+                 for (template, parent), (count, seconds)
+                 in stats.templates.items()),
+                key=lambda row: -row[3],
+            ),
+        )
+        stale = Profile.objects.order_by("-pk").values_list(
+            "pk", flat=True
+        )[settings.PROFILING_KEEP:settings.PROFILING_KEEP + 1]
+        if stale:
+            Profile.objects.filter(pk__lte=stale[0]).delete()
+        return profile
+
+
+class SamplingMiddleware:
+    """
+    Регистрирует поток запроса в постоянном сэмплере стеков процесса.
+
+    Сэмплер запускается при первом запросе, уже после fork воркера.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SAMPLING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        requests = get_sampler().requests
+        thread_id = threading.get_ident()
+        requests[thread_id] = request
+        try:
+            return self.get_response(request)
+        finally:
+            del requests[thread_id]
+
+
+class TrafficCaptureMiddleware:
+    """
+    Пишет долю TRAFFIC_CAPTURE_SAMPLE_RATE запросов в обезличенный
+    журнал для `manage.py replay_traffic`.
+
+    Ставится после AuthenticationMiddleware; время берётся от начала
+    сбора показателей внешними middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRAFFIC_CAPTURE_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.TRAFFIC_CAPTURE_SAMPLE_RATE:
+            return self.get_response(request)
+        with collect_stats(request) as stats:
+            response = self.get_response(request)
+        if request.resolver_match is not None:
+            capture(request, response, stats.elapsed)
+        return response
+
+
+class MemoryBudgetMiddleware:
+    """
+    Измеряет пик памяти доли MEMORY_SAMPLE_RATE запросов.
+
+    Пик пишется в метрику, а превышение бюджета памяти представления
+    дополнительно считается и пишется в лог.
+    """
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.MEMORY_SAMPLE_RATE:
+            return self.get_response(request)
+        with measure_peak() as memory:
+            response = self.get_response(request)
+        if memory.peak is None:
+            return response
+        view = (("view", view_name(request)),)
+        registry.observe(
+            "blogicum_request_peak_memory_bytes", view, memory.peak
+        )
+        budget = get_memory_budget(request.resolver_match)
+        if budget is not None and memory.peak > budget:
+            registry.inc("blogicum_memory_budget_exceeded_total", view)
+            logger.warning(
+                "%s %s: пик памяти %d байт при бюджете %d (%s)",
+                request.method, request.get_full_path(), memory.peak,
+                budget, view[0][1],
+            )
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Снят')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=2048, verbose_name='Адрес')),
+                ('view', models.CharField(max_length=200, verbose_name='Представление')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='Статус')),
+                ('mode', models.CharField(choices=[('cprofile', 'cProfile'), ('sample', 'Сэмплирование')], max_length=10, verbose_name='Режим')),
+                ('duration', models.FloatField(verbose_name='Время, с')),
+                ('queries', models.PositiveIntegerField(verbose_name='SQL-запросов')),
+                ('query_time', models.FloatField(verbose_name='Время SQL, с')),
+                ('template_time', models.FloatField(verbose_name='Время шаблонов, с')),
+                ('call_tree', models.TextField(verbose_name='Профиль вызовов')),
+                ('sql', models.JSONField(default=list, help_text='Пары [текст запроса, время в мс].', verbose_name='SQL')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='templates',
+            field=models.JSONField(default=list, help_text='[шаблон, включивший шаблон, рендеров, время в мс] по убыванию времени.', verbose_name='Шаблоны'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import models
+
+from .profiling import MODE_CPROFILE, MODE_SAMPLE
+
+
+class Profile(models.Model):
+    """Профиль одного запроса, снятый по запросу персонала."""
+
+    MODE_CHOICES = (
+        (MODE_CPROFILE, "cProfile"),
+        (MODE_SAMPLE, "Сэмплирование"),
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Снят"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        verbose_name="Пользователь"
+    )
+    method = models.CharField(max_length=10, verbose_name="Метод")
+    path = models.CharField(max_length=2048, verbose_name="Адрес")
+    view = models.CharField(max_length=200, verbose_name="Представление")
+    status = models.PositiveSmallIntegerField(verbose_name="Статус")
+    mode = models.CharField(
+        max_length=10,
+        choices=MODE_CHOICES,
+        verbose_name="Режим"
+    )
+    duration = models.FloatField(verbose_name="Время, с")
+    queries = models.PositiveIntegerField(verbose_name="SQL-запросов")
+    query_time = models.FloatField(verbose_name="Время SQL, с")
+    template_time = models.FloatField(verbose_name="Время шаблонов, с")
+    call_tree = models.TextField(verbose_name="Профиль вызовов")
+    sql = models.JSONField(
+        default=list,
+        verbose_name="SQL",
+        help_text="Пары [текст запроса, время в мс]."
+    )
+    templates = models.JSONField(
+        default=list,
+        verbose_name="Шаблоны",
+        help_text=(
+            "[шаблон, включивший шаблон, рендеров, время в мс] "
+            "по убыванию времени."
+        )
+    )
+
+    class Meta:
+        verbose_name = "профиль запроса"
+        verbose_name_plural = "Профили запросов"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration * 1000:.0f} мс)"
@@ -0,0 +1,241 @@
+"""
+Профилирование запросов.
+
+Два режима: детерминированный cProfile — точные счётчики вызовов,
+но заметно замедляет код, и сэмплирующий — стек потока запроса
+снимается раз в PROFILING_SAMPLE_INTERVAL секунд, накладные расходы
+малы, но короткие функции могут не попасть в выборку.
+
+Помимо этого `ContinuousSampler` постоянно сэмплирует рабочие потоки
+каждого воркера и копит свёрнутые стеки по маршрутам для flamegraph.
+"""
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from time import monotonic, perf_counter
+
+from django.conf import settings
+
+from .utils import view_name
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+# Узлы дерева вызовов с меньшей долей выборок не показываются
+CALL_TREE_MIN_SHARE = 0.01
+
+
+def frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}:{code.co_qualname}"
+
+
+def fold(frame):
+    """Свёрнутый стек: кадры от корня к листу через точку с запятой."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Поток, периодически снимающий стеки заданных потоков.
+
+    Стеки копятся в `stacks` в свёрнутом виде (формат flamegraph.pl):
+    строка стека -> число выборок.
+    """
+
+    def __init__(self, interval, thread_ids):
+        self.interval = interval
+        self.thread_ids = set(thread_ids)
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread_id in self.thread_ids:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.stacks[fold(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+def call_tree(stacks, min_share=CALL_TREE_MIN_SHARE):
+    """Дерево вызовов с долями выборок из свёрнутых стеков."""
+    total = sum(stacks.values())
+    if not total:
+        return ""
+    tree = {}
+    for stack, count in stacks.items():
+        node = tree
+        for label in stack.split(";"):
+            child = node.setdefault(label, [0, {}])
+            child[0] += count
+            node = child[1]
+    lines = []
+
+    def walk(node, depth):
+        for label, (count, children) in sorted(
+            node.items(), key=lambda item: -item[1][0]
+        ):
+            if count / total < min_share:
+                continue
+            lines.append(
+                f"{count / total:6.1%} {count:5d}  {'  ' * depth}{label}"
+            )
+            walk(children, depth + 1)
+
+    walk(tree, 0)
+    return "\n".join(lines)
+
+
+class DeterministicProfiler:
+
+    def __enter__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+
+    def report(self):
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(settings.PROFILING_STATS_LIMIT)
+        return stream.getvalue()
+
+
+class SamplingProfiler:
+
+    def __enter__(self):
+        self.sampler = StackSampler(
+            settings.PROFILING_SAMPLE_INTERVAL, {threading.get_ident()}
+        )
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+
+    def report(self):
+        return call_tree(self.sampler.stacks)
+
+
+class ContinuousSampler(StackSampler):
+    """
+    Постоянный сэмплер потоков, обрабатывающих запросы.
+
+    Стек каждого такого потока сворачивается с именем представления
+    в корне, поэтому flamegraph делится по маршрутам. Пауза между
+    выборками растёт, если сама выборка занимает больше `max_overhead`
+    от интервала. Накопленные стеки раз в `flush_interval` секунд
+    пишутся в файл процесса `directory/<pid>.folded`.
+    """
+
+    def __init__(self, interval, max_overhead, directory, flush_interval):
+        super().__init__(interval, ())
+        self.max_overhead = max_overhead
+        self.path = Path(directory) / f"{os.getpid()}.folded"
+        self.flush_interval = flush_interval
+        self._flushed_at = monotonic()
+        # Идентификатор потока -> обрабатываемый им запрос
+        self.requests = {}
+
+    def _run(self):
+        wait = self.interval
+        while not self._stopped.wait(wait):
+            start = perf_counter()
+            self.sample()
+            if monotonic() - self._flushed_at >= self.flush_interval:
+                self.flush()
+            cost = perf_counter() - start
+            wait = max(self.interval, cost / self.max_overhead - cost)
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread_id, request in list(self.requests.items()):
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.stacks[f"{view_name(request)};{fold(frame)}"] += 1
+
+    def flush(self):
+        self._flushed_at = monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as folded:
+            folded.writelines(
+                f"{stack} {count}\n"
+                for stack, count in list(self.stacks.items())
+            )
+        os.replace(tmp_path, self.path)
+
+    def stop(self):
+        super().stop()
+        self.flush()
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """Сэмплер текущего процесса; запускается при первом обращении."""
+    global _sampler
+    if _sampler is not None and _sampler.path.stem == str(os.getpid()):
+        return _sampler
+    with _sampler_lock:
+        if _sampler is None or _sampler.path.stem != str(os.getpid()):
+            # После fork поток родителя в дочернем процессе не работает
+            _sampler = ContinuousSampler(
+                settings.SAMPLING_INTERVAL,
+                settings.SAMPLING_MAX_OVERHEAD,
+                settings.SAMPLING_DIR,
+                settings.SAMPLING_FLUSH_INTERVAL,
+            )
+            _sampler.start()
+            atexit.register(_sampler.stop)
+    return _sampler
+
+
+def read_folded(directory):
+    """Суммирует свёрнутые стеки из файлов всех процессов."""
+    stacks = Counter()
+    for path in Path(directory).glob("*.folded"):
+        with open(path, encoding="utf-8") as folded:
+            for line in folded:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if count.isdigit():
+                    stacks[stack] += int(count)
+    return stacks
+
+
+PROFILERS = {
+    MODE_CPROFILE: DeterministicProfiler,
+    MODE_SAMPLE: SamplingProfiler,
+}
@@ -0,0 +1,120 @@
+"""
+Журнал медленных SQL-запросов с планом выполнения.
+
+Запросы дольше SLOW_QUERY_THRESHOLD секунд пишутся в логгер
+`core.slowlog` строкой JSON: нормализованный SQL и его отпечаток,
+план EXPLAIN (QUERY PLAN), представление и место вызова в коде
+проекта. Параметры запросов не пишутся.
+"""
+import hashlib
+import json
+import logging
+import re
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+PLACEHOLDER_RE = re.compile(r"%s|\?")
+IN_LIST_RE = re.compile(r"\bIN \(\?(?:, ?\?)*\)", re.I)
+SPACE_RE = re.compile(r"\s+")
+SELECT_RE = re.compile(r"\s*(SELECT|WITH)\b", re.I)
+# Сколько кадров стека проекта сохранять у медленного запроса
+ORIGIN_DEPTH = 5
+
+
+def normalize_sql(sql):
+    """Заменяет литералы и параметры на ?, списки IN (...) — на IN (...)."""
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = PLACEHOLDER_RE.sub("?", sql)
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    return SPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:12]
+
+
+def explain(connection, sql, params):
+    """
+    План выполнения SELECT-запроса.
+
+    Выполняется на курсоре СУБД напрямую, в обход обёрток Django,
+    чтобы EXPLAIN не попадал в статистику запроса.
+    """
+    if not SELECT_RE.match(sql):
+        return []
+    prefix = connection.ops.explain_query_prefix()
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f"{prefix} {sql}", params)
+        return [" ".join(map(str, row)) for row in cursor.fetchall()]
+    except Exception as error:  # план не должен ломать запрос
+        return [f"EXPLAIN failed: {error}"]
+    finally:
+        cursor.close()
+
+
+def stack_origin():
+    """Ближайшие к запросу кадры стека из кода проекта."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f"{Path(frame.filename).relative_to(base_dir)}:{frame.lineno}"
+        f" in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and "site-packages" not in frame.filename
+        and not frame.filename.startswith(str(Path(__file__).parent))
+    ]
+    return frames[-ORIGIN_DEPTH:][::-1]
+
+
+def log_slow_query(connection, sql, params, duration, view):
+    normalized = normalize_sql(sql)
+    logger.warning(json.dumps({
+        "time": timezone.now().isoformat(),
+        "duration_ms": round(duration * 1000, 3),
+        "fingerprint": fingerprint(normalized),
+        "sql": normalized,
+        "plan": explain(connection, sql, params),
+        "view": view,
+        "origin": stack_origin(),
+        "database": connection.alias,
+    }, ensure_ascii=False))
+
+
+def aggregate(entries):
+    """
+    Сводка по отпечаткам SQL.
+
+    Возвращает:
+        list: Словари с числом вызовов, суммарным, средним и максимальным
+            временем, представлениями и последним планом
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry["fingerprint"], {
+            "fingerprint": entry["fingerprint"],
+            "sql": entry["sql"],
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "views": {},
+        })
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+        group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+        group["views"][entry["view"]] = (
+            group["views"].get(entry["view"], 0) + 1
+        )
+        group["plan"] = entry["plan"]
+        group["origin"] = entry["origin"]
+    for group in groups.values():
+        group["mean_ms"] = group["total_ms"] / group["count"]
+    return list(groups.values())
@@ -0,0 +1,63 @@
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import (
+    ENCODING_BROTLI, ENCODING_GZIP, compress, supported_encodings
+)
+
+SUFFIXES = {ENCODING_BROTLI: ".br", ENCODING_GZIP: ".gz"}
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css", ".js", ".map", ".svg", ".ico", ".txt", ".json", ".xml", ".html",
+)
+
+
+def _compress_file(path):
+    """Пишет рядом с файлом .gz и .br, если они получаются меньше."""
+    with open(path, "rb") as source:
+        data = source.read()
+    written = []
+    for encoding in supported_encodings():
+        compressed = compress(data, encoding, best=True)
+        if len(compressed) < len(data):
+            with open(path + SUFFIXES[encoding], "wb") as target:
+                target.write(compressed)
+            written.append(path + SUFFIXES[encoding])
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище статики с хешами в именах и предсжатыми вариантами.
+
+    После collectstatic для каждого хешированного файла с текстовым
+    расширением рядом лежат .gz и .br — их отдаёт
+    `core.middleware.StaticFilesMiddleware` или nginx
+    (gzip_static/brotli_static). Пока collectstatic не запускался,
+    ссылки строятся на исходные имена, как у StaticFilesStorage.
+    """
+
+    # Карты исходников вместе с Bootstrap не поставляются, поэтому
+    # ссылки sourceMappingURL не переписываются.
+    patterns = tuple(
+        (extension, tuple(
+            pattern for pattern in extension_patterns
+            if "sourceMappingURL" not in str(pattern)
+        ))
+        for extension, extension_patterns
+        in ManifestStaticFilesStorage.patterns
+    )
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                _compress_file(self.path(name))
@@ -0,0 +1,101 @@
+"""
+Запись выборки реальных запросов и их воспроизведение.
+
+В журнал попадают только метод, имя маршрута, его аргументы, номер
+страницы, состояние входа и время ответа — без тел запросов, cookie и
+адресов клиентов. Имена пользователей в аргументах заменяются на HMAC
+от SECRET_KEY: при воспроизведении на копии базы с тем же ключом их
+можно сопоставить обратно, а прочитать журнал — нельзя.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.db import connections
+from django.utils.crypto import salted_hmac
+
+logger = logging.getLogger(__name__)
+
+HMAC_SALT = "core.traffic"
+# Аргументы маршрутов, которые идентифицируют человека
+ANONYMIZED_KWARGS = {"username"}
+AUTH_ANONYMOUS = "anonymous"
+AUTH_USER = "user"
+AUTH_STAFF = "staff"
+
+
+def anonymize(value):
+    return salted_hmac(HMAC_SALT, str(value)).hexdigest()[:20]
+
+
+def capture(request, response, duration):
+    """Пишет запрос в журнал строкой JSON."""
+    match = request.resolver_match
+    user = request.user
+    kwargs = dict(match.kwargs)
+    own = False
+    for name in ANONYMIZED_KWARGS & kwargs.keys():
+        own = own or kwargs[name] == user.get_username()
+        kwargs[name] = anonymize(kwargs[name])
+    if user.is_staff:
+        auth = AUTH_STAFF
+    else:
+        auth = AUTH_USER if user.is_authenticated else AUTH_ANONYMOUS
+    page = request.GET.get("page")
+    logger.info(json.dumps({
+        "time": round(time.time(), 3),
+        "method": request.method,
+        "view": match.view_name,
+        "kwargs": kwargs,
+        "page": page if page and page.isdigit() else None,
+        "auth": auth,
+        "own": own,
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 3),
+    }))
+
+
+def replay(entries, send, speed=1.0, concurrency=8):
+    """
+    Воспроизводит записи с исходными интервалами, делёнными на `speed`.
+
+    При speed=0 записи отправляются без пауз. `send` получает запись
+    и возвращает статус ответа либо None, если запись пропущена.
+    Исключение в `send` записывается в журнал и считается ответом 500.
+
+    Возвращает:
+        list: Тройки (имя маршрута, задержка в секундах, статус)
+    """
+
+    def worker(entry):
+        start = time.perf_counter()
+        try:
+            status = send(entry)
+        except Exception:
+            logger.exception("Не удалось воспроизвести %s", entry["view"])
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+        finally:
+            connections.close_all()
+        if status is None:
+            return None
+        return entry["view"], time.perf_counter() - start, int(status)
+
+    entries = sorted(entries, key=lambda entry: entry["time"])
+    if not entries:
+        return []
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        first = entries[0]["time"]
+        started = time.perf_counter()
+        for entry in entries:
+            if speed:
+                delay = (entry["time"] - first) / speed - (
+                    time.perf_counter() - started
+                )
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(executor.submit(worker, entry))
+    records = (future.result() for future in futures)
+    return [record for record in records if record is not None]
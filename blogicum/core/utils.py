@@ -0,0 +1,112 @@
+import re
+
+from django.utils.http import parse_http_date_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(statobj):
+    """Строит ETag файла по времени изменения и размеру."""
+    return '"{:x}-{:x}"'.format(int(statobj.st_mtime_ns), statobj.st_size)
+
+
+def etag_matches(header, etag):
+    """Проверяет, совпадает ли ETag с заголовком If-None-Match/If-Range."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in tags
+
+
+def not_modified(request, etag, mtime):
+    """
+    Решает, можно ли ответить клиенту 304 Not Modified.
+
+    If-None-Match имеет приоритет над If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    since = parse_http_date_safe(
+        request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+    )
+    return since is not None and int(mtime) <= since
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с единственным диапазоном байтов.
+
+    Возвращает:
+        tuple | None: Пару (start, end) включительно, None если
+            заголовок отсутствует или не поддерживается
+    Исключения:
+        ValueError: Диапазон не пересекается с файлом
+    """
+    match = RANGE_RE.match(header or "")
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+class FileRange:
+    """
+    Файл, ограниченный диапазоном байтов.
+
+    Сохраняет `fileno()` и `tell()`, поэтому `wsgi.file_wrapper`
+    сервера (gunicorn, uWSGI) по-прежнему отдаёт данные через
+    `os.sendfile` без копирования в Python, а Content-Length
+    ограничивает длину передачи.
+    """
+
+    def __init__(self, file, start, length):
+        self._file = file
+        self._file.seek(start)
+        self._remaining = length
+        self.name = file.name
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+def accepted_encodings(header):
+    """Возвращает кодировки из Accept-Encoding, не запрещённые q=0."""
+    encodings = set()
+    for item in (header or "").split(","):
+        token, _, params = item.partition(";")
+        token = token.strip().lower()
+        quality = params.strip().removeprefix("q=")
+        if token and quality not in ("0", "0.0", "0.00", "0.000"):
+            encodings.add(token)
+    return encodings
+
+
+def view_name(request):
+    """Имя маршрута запроса для меток метрик и логов."""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unresolved>"
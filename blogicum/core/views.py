@@ -0,0 +1,122 @@
+import mimetypes
+import posixpath
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .metrics import collect, render_prometheus
+from .utils import (
+    FileRange, etag_matches, file_etag, not_modified, parse_range
+)
+
+MEDIA_SERVE_DJANGO = "django"
+MEDIA_SERVE_ACCEL = "x-accel-redirect"
+MEDIA_SERVE_SENDFILE = "x-sendfile"
+
+
+def _set_cache_headers(response, etag, statobj):
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(statobj.st_mtime)
+    response.headers["Cache-Control"] = (
+        f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+    )
+
+
+def _offload_response(mode, path, fullpath, content_type):
+    """Ответ без тела: файл отдаст фронтовой прокси."""
+    response = HttpResponse(content_type=content_type)
+    if mode == MEDIA_SERVE_ACCEL:
+        response.headers["X-Accel-Redirect"] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+    else:
+        response.headers["X-Sendfile"] = str(fullpath)
+    return response
+
+
+def _file_response(request, fullpath, etag, size, content_type):
+    """Отдаёт файл целиком или диапазон из заголовка Range."""
+    byte_range = None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range or etag_matches(if_range, etag):
+        try:
+            byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+    file = fullpath.open("rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            FileRange(file, start, length),
+            content_type=content_type,
+            status=206,
+        )
+        response.headers["Content-Length"] = length
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт загруженные файлы из MEDIA_ROOT.
+
+    В режиме `x-accel-redirect`/`x-sendfile` передача файла
+    делегируется фронтовому прокси, иначе файл отдаётся через
+    FileResponse (sendfile у WSGI-сервера) с поддержкой Range.
+    """
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+        statobj = fullpath.stat()
+    except (OSError, ValueError, SuspiciousFileOperation):
+        raise Http404
+    if not fullpath.is_file():
+        raise Http404
+
+    etag = file_etag(statobj)
+    if not_modified(request, etag, statobj.st_mtime):
+        response = HttpResponseNotModified()
+        _set_cache_headers(response, etag, statobj)
+        return response
+
+    content_type, encoding = mimetypes.guess_type(path)
+    content_type = content_type or "application/octet-stream"
+    mode = settings.MEDIA_SERVE_MODE
+    if mode in (MEDIA_SERVE_ACCEL, MEDIA_SERVE_SENDFILE):
+        response = _offload_response(mode, path, fullpath, content_type)
+    else:
+        response = _file_response(
+            request, fullpath, etag, statobj.st_size, content_type
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    _set_cache_headers(response, etag, statobj)
+    return response
+
+
+def metrics(request):
+    """Метрики всех воркеров в текстовом формате Prometheus."""
+    if not (
+        request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+        or request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        render_prometheus(*collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
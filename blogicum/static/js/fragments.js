@@ -0,0 +1,73 @@
+// Фрагменты страниц вместо полных перезагрузок. Запросы идут с
+// заголовком X-Fragment; без JavaScript ссылки и формы работают как
+// обычно.
+//
+// <a data-fragment="url"> загружает url и встаёт на место ссылки или
+// ближайшего предка из data-fragment-target.
+// <form data-fragment> отправляется в фоне; ответ заменяет предка из
+// data-fragment-target либо вставляется перед элементом из
+// data-fragment-before. Пустой ответ удаляет заменяемый элемент.
+// Перенаправление (например, на вход) означает, что фрагмента не будет
+const OPTIONS = {
+  headers: { "X-Fragment": "1" },
+  credentials: "same-origin",
+  redirect: "manual",
+};
+
+function place(html, target, before) {
+  const template = document.createElement("template");
+  template.innerHTML = html;
+  // Элемент, уже показанный на странице, заменяется новой версией
+  template.content.querySelectorAll("[id]").forEach((element) => {
+    const existing = document.getElementById(element.id);
+    if (existing && existing !== target) {
+      existing.remove();
+    }
+  });
+  if (before) {
+    target.before(template.content);
+  } else {
+    target.replaceWith(template.content);
+  }
+}
+
+function load(response) {
+  return response.ok ? response.text() : Promise.reject(response);
+}
+
+document.addEventListener("click", (event) => {
+  const link = event.target.closest("a[data-fragment]");
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  const target = link.dataset.fragmentTarget;
+  fetch(link.dataset.fragment, OPTIONS)
+    .then(load)
+    .then((html) => place(html, target ? link.closest(target) : link))
+    .catch(() => {
+      window.location.href = link.href;
+    });
+});
+
+document.addEventListener("submit", (event) => {
+  const form = event.target;
+  if (!form.matches("form[data-fragment]")) {
+    return;
+  }
+  event.preventDefault();
+  fetch(form.action, { ...OPTIONS, method: "POST", body: new FormData(form) })
+    .then(load)
+    .then((html) => {
+      const before = form.dataset.fragmentBefore;
+      if (before) {
+        place(html, document.querySelector(before), true);
+        form.reset();
+      } else {
+        const target = form.dataset.fragmentTarget;
+        place(html, target ? form.closest(target) : form);
+      }
+    })
+    // Ошибки формы показывает обычная отправка
+    .catch(() => form.submit());
+});
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from typing import Callable
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+from conftest import N_PER_PAGE
+from core.budgets import (
+    duplicate_queries, get_memory_budget, get_query_budget
+)
+from core.memory import measure_peak
+
+COMMENTS_PER_POST = 5
+HEAVY_POSTS = 100
+HEAVY_POST_TEXT_LENGTH = 20_000
+HEAVY_POST_COMMENTS = 2_000
+
+
+@pytest.fixture
+def posts_at_scale(
+    mixer: Mixer, user, another_user, published_locations, published_category
+):
+    """Несколько страниц постов двух авторов с комментариями."""
+    posts = mixer.cycle(N_PER_PAGE * 3).blend(
+        "blog.Post",
+        author=mixer.sequence(user, another_user),
+        category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+    for post in posts:
+        mixer.cycle(COMMENTS_PER_POST).blend(
+            "blog.Comment",
+            post=post,
+            author=mixer.sequence(user, another_user),
+        )
+    return posts
+
+
+@pytest.fixture
+def heavy_posts(user, another_user, published_category):
+    """
+    Автор с длинными постами и пост с тысячами комментариев.
+
+    Возвращает пост с комментариями; записи создаются через
+    bulk_create, иначе фикстура строилась бы минутами.
+    """
+    text = "Очень длинный текст поста. " * (
+        HEAVY_POST_TEXT_LENGTH // 27
+    )
+    posts = Post.objects.bulk_create(
+        Post(
+            title=f"Длинный пост {number}",
+            text=text,
+            author=user,
+            category=published_category,
+            pub_date=timezone.now() - timedelta(days=1, minutes=number),
+        )
+        for number in range(HEAVY_POSTS)
+    )
+    Comment.objects.bulk_create(
+        Comment(
+            text=f"Комментарий {number}",
+            post=posts[0],
+            author=(user, another_user)[number % 2],
+        )
+        for number in range(HEAVY_POST_COMMENTS)
+    )
+    return posts[0]
+
+
+@pytest.fixture
+def assert_memory_budget() -> Callable:
+    """
+    Выполняет запрос и сверяет пик памяти с бюджетом представления.
+
+    GET-запрос сначала выполняется без измерения, чтобы в пик не
+    попали однократные кэши: скомпилированные шаблоны, URL-резолвер.
+
+    Usage:
+    response = assert_memory_budget(user_client, "/")
+    """
+
+    def check(client: Client, url: str, method: str = "get", *args):
+        budget = get_memory_budget(resolve(url.split("?")[0]))
+        assert budget is not None, (
+            f"Для представления по адресу `{url}` не объявлен бюджет"
+            " памяти."
+        )
+        if method == "get":
+            client.get(url, *args)
+        with measure_peak() as memory:
+            response = getattr(client, method)(url, *args)
+        assert memory.peak is not None
+        assert memory.peak <= budget, (
+            f"`{method.upper()} {url}` выделяет до {memory.peak} байт"
+            f" при бюджете {budget}."
+        )
+        return response
+
+    return check
+
+
+@pytest.fixture
+def assert_query_budget() -> Callable:
+    """
+    Выполняет запрос и сверяет число SQL с бюджетом представления.
+
+    Usage:
+    response = assert_query_budget(user_client, "/")
+    response = assert_query_budget(user_client, url, "post", data)
+    """
+
+    def check(
+        client: Client, url: str, method: str = "get", *args, **kwargs
+    ):
+        budget = get_query_budget(resolve(url.split("?")[0]))
+        assert budget is not None, (
+            f"Для представления по адресу `{url}` не объявлен бюджет"
+            " SQL-запросов."
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, *args, **kwargs)
+        statements = [query["sql"] for query in context.captured_queries]
+        duplicates = "\n".join(
+            f"  {count} x {sql}"
+            for sql, count in duplicate_queries(statements)
+        )
+        assert len(statements) <= budget, (
+            f"`{method.upper()} {url}` выполняет {len(statements)}"
+            f" SQL-запросов при бюджете {budget}. Повторы:\n{duplicates}"
+        )
+        return response
+
+    return check
@@ -0,0 +1,162 @@
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from api.utils import dumps
+from blog.models import Location
+from blog.utils import get_post_queryset
+
+
+def walk(client, url, assert_query_budget):
+    """Все страницы списка API по ссылкам next."""
+    results = []
+    while url:
+        response = assert_query_budget(client, url)
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == "application/json"
+        data = response.json()
+        results.extend(data["results"])
+        url = data["next"]
+    return results
+
+
+@pytest.mark.django_db
+def test_post_list(
+    assert_query_budget, client, unpublished_posts_with_published_locations,
+    posts_at_scale
+):
+    results = walk(client, "/api/posts/?limit=7", assert_query_budget)
+    expected = list(get_post_queryset(
+        filter_published=True
+    ).values_list("pk", flat=True))
+    assert [post["id"] for post in results] == expected, (
+        "Убедитесь, что API отдаёт по курсору все опубликованные посты по"
+        " порядку, без пропусков и повторов."
+    )
+    assert results[0]["comment_count"] == 5
+
+    results = walk(
+        client, "/api/posts/?fields=id,title", assert_query_budget
+    )
+    assert set(results[0]) == {"id", "title"}, (
+        "Убедитесь, что параметр fields ограничивает поля ответа."
+    )
+
+
+@pytest.mark.django_db
+def test_post_detail_and_comments(
+    assert_query_budget, client, posts_at_scale,
+    unpublished_posts_with_published_locations
+):
+    post = posts_at_scale[0]
+    response = assert_query_budget(
+        client, f"/api/posts/{post.id}/?fields=id,text,category"
+    )
+    assert response.json() == {
+        "id": post.id, "text": post.text, "category": post.category.slug
+    }
+    comments = walk(
+        client, f"/api/posts/{post.id}/comments/?limit=2",
+        assert_query_budget
+    )
+    assert [comment["id"] for comment in comments] == list(
+        post.comments.order_by("created_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    hidden = unpublished_posts_with_published_locations[0]
+    for url in (
+        f"/api/posts/{hidden.id}/", f"/api/posts/{hidden.id}/comments/"
+    ):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            "Убедитесь, что API не отдаёт неопубликованные посты."
+        )
+        assert "error" in response.json()
+
+
+@pytest.mark.django_db
+def test_categories_and_locations(
+    assert_query_budget, client, published_category, published_locations,
+    posts_with_unpublished_category
+):
+    categories = walk(client, "/api/categories/", assert_query_budget)
+    assert [category["slug"] for category in categories] == [
+        published_category.slug
+    ]
+    locations = walk(client, "/api/locations/", assert_query_budget)
+    assert {location["id"] for location in locations} == set(
+        Location.objects.filter(is_published=True)
+        .values_list("pk", flat=True)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("posts_at_scale")
+def test_etag_and_errors(client):
+    response = client.get("/api/posts/")
+    assert "public" in response["Cache-Control"]
+    response = client.get(
+        "/api/posts/", headers={"If-None-Match": response["ETag"]}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что API отвечает 304 на совпадающий If-None-Match."
+    )
+    for query in (
+        "fields=id,password", "limit=0", "limit=1000", "limit=²", "after=x"
+    ):
+        response = client.get(f"/api/posts/?{query}")
+        assert response.status_code == HTTPStatus.BAD_REQUEST, query
+        assert "error" in response.json()
+    assert client.post("/api/posts/").status_code == (
+        HTTPStatus.METHOD_NOT_ALLOWED
+    )
+
+
+def test_dumps_datetime_format():
+    moment = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert dumps({"at": moment}) == (
+        b'{"at":"2024-05-01T12:30:15.123456Z"}'
+    ), "Убедитесь, что API отдаёт время в UTC в одном формате."
+
+
+@pytest.mark.django_db
+def test_post_batch(
+    client, user_client, posts_at_scale, django_assert_num_queries,
+    unpublished_posts_with_published_locations
+):
+    cache.clear()
+    hidden = unpublished_posts_with_published_locations[0]
+    ids = [posts_at_scale[1].id, hidden.id, 10 ** 9, posts_at_scale[0].id]
+    url = "/api/posts/batch/?fields=id,title&ids=" + ",".join(map(str, ids))
+    with django_assert_num_queries(1):
+        data = client.get(url).json()
+    assert [post["id"] for post in data["results"]] == [ids[0], ids[3]], (
+        "Убедитесь, что пакетный запрос отдаёт видимые посты в порядке"
+        " ids одним запросом к базе."
+    )
+    assert data["missing"] == [hidden.id, 10 ** 9]
+    with django_assert_num_queries(0):
+        client.get(url)
+
+    response = user_client.get(url)
+    assert hidden.id in [post["id"] for post in response.json()["results"]], (
+        "Убедитесь, что автор видит свои неопубликованные посты."
+    )
+    assert "private" in response["Cache-Control"]
+
+    post = posts_at_scale[0]
+    post.title = "Новый заголовок"
+    post.save()
+    titles = [item["title"] for item in client.get(url).json()["results"]]
+    assert "Новый заголовок" in titles, (
+        "Убедитесь, что изменение поста сбрасывает его запись в кэше."
+    )
+    response = client.get("/api/posts/batch/?ids=" + ",".join(
+        map(str, range(1, 200))
+    ))
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    for ids in ("", "1,x", "1,-2", "1,²"):
+        response = client.get(f"/api/posts/batch/?ids={ids}")
+        assert response.status_code == HTTPStatus.BAD_REQUEST, ids
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.management.commands.benchmark_feed import (
+    STRATEGIES, add_counter_column, measure
+)
+from blog.models import Post
+from blog.utils import get_post_queryset
+from conftest import N_PER_PAGE
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("posts_at_scale")
+@pytest.mark.parametrize("page", [1, 2])
+@pytest.mark.parametrize("same_pub_date", [False, True])
+def test_feed_strategies_agree(page, same_pub_date):
+    if same_pub_date:
+        # generate_data даёт много постов с одинаковой pub_date
+        Post.objects.update(pub_date=timezone.now() - timedelta(days=1))
+    add_counter_column()
+    offset = (page - 1) * N_PER_PAGE
+    cursor = None
+    if offset:
+        cursor = get_post_queryset(filter_published=True).order_by(
+            "-pub_date", "-pk"
+        ).values_list("pub_date", "pk")[offset - 1]
+    expected = [
+        (post.pk, post.comment_count)
+        for post in STRATEGIES["baseline"](offset, N_PER_PAGE)
+    ]
+    assert expected
+    for name, strategy in STRATEGIES.items():
+        args = (offset, N_PER_PAGE) + ((cursor,) if name == "keyset" else ())
+        posts = strategy(*args)
+        assert [(post.pk, post.comment_count) for post in posts] == (
+            expected
+        ), f"Стратегия {name} возвращает другую страницу ленты."
+
+    result = measure(lambda: STRATEGIES["prefiltered_ids"](0, N_PER_PAGE))
+    assert result["queries"] == 3 and result["vm_steps"] > 0
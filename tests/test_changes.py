@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+
+@pytest.fixture
+def sync(client, settings):
+    """Синхронизирует клиента с курсора прошлого вызова."""
+    settings.API_SYNC_DELAY = 0
+    state = {"cursor": None}
+
+    def changes():
+        url = "/api/changes/"
+        if state["cursor"]:
+            url += f"?after={state['cursor']}"
+        results = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert all(
+                "blog_" not in query["sql"]
+                for query in context.captured_queries
+            ), "Убедитесь, что синхронизация читает только журнал изменений."
+            results.extend(data["results"])
+            state["cursor"] = data["cursor"]
+            url = data["next"]
+        return {(item["type"], item["id"]): item for item in results}
+
+    return changes
+
+
+@pytest.mark.django_db
+def test_delta_sync(sync, user, published_category, published_location):
+    post = Post.objects.create(
+        title="Пост", text="Текст", author=user, category=published_category,
+        location=published_location, pub_date=timezone.now(),
+    )
+    comment = Comment.objects.create(text="Первый", post=post, author=user)
+    changes = sync()
+    assert changes[("post", post.id)]["data"]["location"] == (
+        published_location.name
+    )
+    assert changes[("comment", comment.id)]["data"]["text"] == "Первый"
+    assert ("category", published_category.id) in changes
+    assert sync() == {}, (
+        "Убедитесь, что после курсора отдаются только новые изменения."
+    )
+
+    post.title = "Новый заголовок"
+    post.save()
+    changes = sync()
+    assert list(changes) == [("post", post.id)]
+    assert changes[("post", post.id)]["data"]["title"] == "Новый заголовок"
+
+    comment_id = comment.id
+    comment.delete()
+    assert sync()[("comment", comment_id)]["action"] == "delete", (
+        "Убедитесь, что удаление комментария даёт надгробие."
+    )
+
+    published_category.is_published = False
+    published_category.save()
+    changes = sync()
+    assert changes[("post", post.id)]["action"] == "delete", (
+        "Убедитесь, что снятие категории с публикации скрывает её посты."
+    )
+    published_category.is_published = True
+    published_category.save()
+    assert sync()[("post", post.id)]["action"] == "upsert"
+
+    Comment.objects.create(text="Второй", post=post, author=user)
+    sync()
+    post_id = post.id
+    post.delete()
+    assert sync() == {("post", post_id): {
+        "type": "post", "id": post_id, "action": "delete", "data": None
+    }}, (
+        "Убедитесь, что удаление поста даёт одно надгробие без надгробий"
+        " комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_scheduled_post_synced_at_pub_date(sync, user, published_category):
+    post = Post.objects.create(
+        title="Отложенный", text="Текст", author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert ("post", post.id) not in sync(), (
+        "Убедитесь, что отложенный пост не попадает в синхронизацию до"
+        " даты публикации."
+    )
+    post.pub_date = timezone.now() - timedelta(minutes=1)
+    post.save()
+    assert sync()[("post", post.id)]["action"] == "upsert"
+
+
+@pytest.mark.django_db
+def test_log_snapshot(sync, user, published_category):
+    Post.objects.bulk_create(
+        Post(
+            title=f"Пост {number}", text="Текст", author=user,
+            category=published_category, pub_date=timezone.now(),
+        )
+        for number in range(3)
+    )
+    assert not any(key[0] == "post" for key in sync())
+    call_command("log_snapshot", stdout=StringIO())
+    assert sum(key[0] == "post" for key in sync()) == 3, (
+        "Убедитесь, что log_snapshot дописывает в журнал посты, созданные"
+        " в обход сигналов."
+    )
+
+
+@pytest.mark.django_db
+def test_batched_relog(
+    sync, user, published_category, django_assert_max_num_queries
+):
+    posts = [
+        Post.objects.create(
+            title=f"Пост {number}", text="Текст", author=user,
+            category=published_category, pub_date=timezone.now(),
+        )
+        for number in range(10)
+    ]
+    for post in posts:
+        Comment.objects.create(text="Комментарий", post=post, author=user)
+    sync()
+    published_category.is_published = False
+    with django_assert_max_num_queries(6):
+        published_category.save()
+    published_category.is_published = True
+    with django_assert_max_num_queries(8):
+        published_category.save()
+    changes = sync()
+    assert sum(
+        key[0] == "post" and item["action"] == "upsert"
+        for key, item in changes.items()
+    ) == 10, (
+        "Убедитесь, что посты категории переписываются пачкой, а не"
+        " запросом на каждый пост."
+    )
+    assert sum(key[0] == "comment" for key in changes) == 10
@@ -0,0 +1,123 @@
+import re
+from http import HTTPStatus
+
+import pytest
+
+from blog.models import Comment
+
+FRAGMENT_RE = re.compile(r'data-fragment="(/posts/\d+/comments/[^"]+)"')
+COMMENT_RE = re.compile(r'name="comment_(\d+)"')
+
+
+@pytest.mark.django_db
+def test_comments_loaded_by_cursor(
+    assert_query_budget, settings, user_client, heavy_posts
+):
+    response = user_client.get(f"/posts/{heavy_posts.id}/")
+    content = response.content.decode()
+    seen = [int(pk) for pk in COMMENT_RE.findall(content)]
+    assert len(seen) == settings.COMMENTS_PAGE_SIZE, (
+        "Убедитесь, что страница поста показывает только первую страницу"
+        " комментариев."
+    )
+    match = FRAGMENT_RE.search(content)
+    while match:
+        response = assert_query_budget(user_client, match.group(1))
+        assert response.status_code == HTTPStatus.OK
+        content = response.content.decode()
+        assert "<form" not in content and "<html" not in content, (
+            "Убедитесь, что «Показать ещё» возвращает только комментарии."
+        )
+        seen.extend(int(pk) for pk in COMMENT_RE.findall(content))
+        match = FRAGMENT_RE.search(content)
+    expected = list(
+        heavy_posts.comments.order_by("created_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    assert seen == expected, (
+        "Убедитесь, что подгрузка по курсору выдаёт все комментарии поста"
+        " по порядку, без пропусков и повторов."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_cursor_without_js(client, post_with_published_location):
+    post = post_with_published_location
+    comments = Comment.objects.bulk_create(
+        Comment(text=f"Комментарий {number}", post=post, author=post.author)
+        for number in range(3)
+    )
+    response = client.get(f"/posts/{post.id}/?after=мусор")
+    assert response.status_code == HTTPStatus.OK
+    assert len(COMMENT_RE.findall(response.content.decode())) == 3, (
+        "Убедитесь, что неверный курсор показывает первую страницу."
+    )
+    response = client.get(f"/posts/{post.id}/comments/")
+    ids = [int(pk) for pk in COMMENT_RE.findall(response.content.decode())]
+    assert ids == [comment.id for comment in comments]
+
+
+@pytest.mark.django_db
+def test_comments_fragment_visibility(
+    client, user_client, unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    assert client.get(f"/posts/{post.id}/comments/").status_code == (
+        HTTPStatus.NOT_FOUND
+    ), (
+        "Убедитесь, что комментарии неопубликованного поста недоступны"
+        " никому, кроме автора."
+    )
+    assert user_client.get(
+        f"/posts/{post.id}/comments/"
+    ).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_comment_mutation_fragments(
+    assert_query_budget, user_client, another_user_client,
+    post_with_published_location
+):
+    post = post_with_published_location
+    headers = {"X-Fragment": "1"}
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/comment/", "post",
+        {"text": "Новый комментарий"}, headers=headers,
+    )
+    comment = Comment.objects.get(post=post)
+    content = response.content.decode()
+    assert response.status_code == HTTPStatus.OK and (
+        f'id="comment-{comment.id}"' in content
+        and "<html" not in content and "<form" not in content
+    ), (
+        "Убедитесь, что с заголовком X-Fragment добавление комментария"
+        " возвращает только разметку нового комментария."
+    )
+
+    url = f"/posts/{post.id}/edit_comment/{comment.id}/"
+    response = user_client.get(url, headers=headers)
+    content = response.content.decode()
+    assert "<form" in content and "<html" not in content, (
+        "Убедитесь, что форма редактирования отдаётся фрагментом."
+    )
+    assert "X-Fragment" in response["Vary"]
+    response = assert_query_budget(
+        user_client, url, "post", {"text": "Исправленный"}, headers=headers
+    )
+    assert "Исправленный" in response.content.decode()
+    response = user_client.post(url, {"text": ""}, headers=headers)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    response = another_user_client.post(
+        url, {"text": "Чужой"}, headers=headers
+    )
+    assert response.status_code == HTTPStatus.FOUND
+
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/delete_comment/{comment.id}/",
+        "post", headers=headers,
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT, (
+        "Убедитесь, что удаление комментария во фрагментном режиме"
+        " возвращает пустой ответ."
+    )
+    assert not Comment.objects.filter(pk=comment.pk).exists()
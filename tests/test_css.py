@@ -0,0 +1,104 @@
+import shutil
+
+from django.core.management import call_command
+
+from core.css import parse, purge, serialize, split_selectors, used_classes
+
+
+def purged(css, classes, **kwargs):
+    nodes, _ = parse(css)
+    return serialize(purge(nodes, set(classes), **kwargs))
+
+
+def test_nested_media_purged():
+    css = (
+        "@media (min-width:576px){@supports (display:grid){"
+        ".used{color:red}.unused{color:blue}}.gone{margin:0}}"
+        "@media print{.gone{display:none}}"
+    )
+    assert purged(css, {"used"}) == (
+        "@media (min-width:576px){@supports (display:grid){"
+        ".used{color:red}}}"
+    ), (
+        "Убедитесь, что вложенные @media/@supports очищаются рекурсивно,"
+        " а опустевшие блоки выбрасываются."
+    )
+
+
+def test_selector_lists_with_not_and_attributes():
+    prelude = '.btn:not(.a,.b),[type="x,y"] .btn,.other'
+    assert split_selectors(prelude) == [
+        ".btn:not(.a,.b)", '[type="x,y"] .btn', ".other"
+    ]
+    css = (
+        '.btn:not(.disabled){opacity:1}'
+        '.btn[data-x="{"]{color:red}'
+        '.btn,.other{margin:0}'
+    )
+    assert purged(css, {"btn"}) == (
+        '.btn[data-x="{"]{color:red}.btn{margin:0}'
+    ), (
+        "Убедитесь, что селектор остаётся, только если используются все"
+        " его классы, включая классы внутри :not(...)."
+    )
+
+
+def test_strings_and_comments_with_braces():
+    css = (
+        '/* .x{} } */@charset "utf-8";@import url("a{b}.css");'
+        '.a::before{content:"}{"}.b{content:\'\\\'}\'}'
+        'p{margin:0}'
+    )
+    assert purged(css, {"a"}) == (
+        '@import url("a{b}.css");.a::before{content:"}{"}p{margin:0}'
+    ), (
+        "Убедитесь, что скобки в строках и комментариях не ломают разбор,"
+        " а @charset выбрасывается."
+    )
+    assert purged(css, {"a"}, keep_elements=False) == (
+        '.a::before{content:"}{"}'
+    )
+
+
+def test_used_classes(tmp_path):
+    template = tmp_path / "page.html"
+    template.write_text(
+        '<a class="btn {% if x %}active{% endif %} {{ extra }}">'
+        "<p class='lead'>",
+        encoding="utf-8",
+    )
+    assert used_classes([template]) == {"btn", "active", "lead"}
+
+
+def test_build_css_matches_committed(settings, tmp_path):
+    static = tmp_path / "static"
+    templates = tmp_path / "templates"
+    shutil.copytree(settings.STATIC_DIR / "css", static / "css")
+    shutil.copytree(settings.TEMPLATES_DIR, templates)
+    committed = settings.STATIC_DIR / "css" / settings.CSS_PURGED
+    critical = settings.TEMPLATES_DIR / settings.CSS_CRITICAL_INCLUDE
+    settings.STATIC_DIR = static
+    settings.TEMPLATES_DIR = templates
+    settings.CSS_SAFELIST = [*settings.CSS_SAFELIST, "text-truncate"]
+    call_command("build_css")
+    output = (static / "css" / settings.CSS_PURGED).read_text(
+        encoding="utf-8"
+    )
+    assert ".text-truncate{" in output, (
+        "Убедитесь, что классы из CSS_SAFELIST попадают в очищенный CSS."
+    )
+    for selector in (".list-unstyled{", ".alert-danger{", ".disabled"):
+        assert selector in output, (
+            "Убедитесь, что классы из шаблонов и кода django_bootstrap5"
+            " попадают в очищенный CSS."
+        )
+    settings.CSS_SAFELIST = settings.CSS_SAFELIST[:-1]
+    call_command("build_css")
+    assert (static / "css" / settings.CSS_PURGED).read_text(
+        encoding="utf-8"
+    ) == committed.read_text(encoding="utf-8"), (
+        "Пересоберите CSS: `python manage.py build_css`."
+    )
+    assert (templates / settings.CSS_CRITICAL_INCLUDE).read_text(
+        encoding="utf-8"
+    ) == critical.read_text(encoding="utf-8")
@@ -0,0 +1,93 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from blog.utils import get_post_queryset
+
+FRAGMENT_RE = re.compile(r'data-fragment="([^"]+)"')
+POST_RE = re.compile(r'href="/posts/(\d+)/" class="card-link">')
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def walk_feed(client, url, assert_query_budget):
+    """Первая страница ленты и все подгруженные после неё порции."""
+    content = client.get(url).content.decode()
+    seen = [int(pk) for pk in POST_RE.findall(content)]
+    match = FRAGMENT_RE.search(content)
+    while match:
+        response = assert_query_budget(
+            client, match.group(1).replace("&amp;", "&")
+        )
+        assert response.status_code == HTTPStatus.OK
+        content = response.content.decode()
+        assert "<html" not in content, (
+            "Убедитесь, что подгрузка ленты отдаёт только карточки постов."
+        )
+        seen.extend(int(pk) for pk in POST_RE.findall(content))
+        match = FRAGMENT_RE.search(content)
+    return seen, response
+
+
+@pytest.mark.django_db
+def test_feed_fragments(
+    assert_query_budget, client, user_client, user, published_category,
+    posts_at_scale
+):
+    expected = list(get_post_queryset(
+        filter_published=True
+    ).values_list("pk", flat=True))
+    seen, response = walk_feed(client, "/", assert_query_budget)
+    assert seen == expected, (
+        "Убедитесь, что подгрузка ленты по курсору выдаёт все посты по"
+        " порядку, без пропусков и повторов."
+    )
+    assert "public" in response["Cache-Control"], (
+        "Убедитесь, что порции ленты для анонимных пользователей"
+        " разрешено кэшировать."
+    )
+
+    for url, posts in (
+        (f"/category/{published_category.slug}/", published_category.posts),
+        (f"/profile/{user.username}/", user.posts),
+    ):
+        expected = list(get_post_queryset(
+            posts, filter_published=True
+        ).values_list("pk", flat=True))
+        seen, response = walk_feed(user_client, url, assert_query_budget)
+        assert seen == expected
+        assert "private" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("posts_at_scale")
+def test_feed_fragment_cached_for_anonymous(
+    client, django_assert_num_queries
+):
+    first = client.get("/fragment/")
+    with django_assert_num_queries(0):
+        second = client.get("/fragment/")
+    assert first.content == second.content, (
+        "Убедитесь, что порции ленты для анонимных пользователей"
+        " берутся из кэша."
+    )
+    for page in ("²", "-1", "x"):
+        with django_assert_num_queries(0):
+            response = client.get(f"/fragment/?page={page}")
+        assert response.status_code == HTTPStatus.OK, (
+            "Убедитесь, что неверный номер страницы не ломает порцию"
+            " ленты и не создаёт новую запись в кэше."
+        )
+
+
+@pytest.mark.django_db
+def test_category_fragment_requires_login(client, published_category):
+    response = client.get(f"/category/{published_category.slug}/fragment/")
+    assert response.status_code == HTTPStatus.FOUND
@@ -0,0 +1,45 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+OPTIONS = {
+    "seed": 7, "now": "2024-06-01", "users": 20, "categories": 20,
+    "locations": 10, "posts": 300, "stdout": None,
+}
+
+
+def _snapshot():
+    return (
+        list(Post.objects.order_by("pk").values_list(
+            "pk", "author_id", "title", "pub_date", "is_published",
+            "category_id", "location_id",
+        )),
+        list(Comment.objects.order_by("pk").values_list(
+            "post_id", "author_id", "created_at"
+        )),
+    )
+
+
+@pytest.mark.django_db
+def test_generate_data_is_deterministic(tmp_path):
+    with open(tmp_path / "out.txt", "w") as out:
+        call_command("generate_data", **{**OPTIONS, "stdout": out})
+        first = _snapshot()
+        for model in (Comment, Post, Category, Location, get_user_model()):
+            model.objects.all().delete()
+        call_command("generate_data", **{**OPTIONS, "stdout": out})
+    assert _snapshot() == first, (
+        "Убедитесь, что при одинаковом seed генерируются одинаковые данные."
+    )
+    anchor = timezone.make_aware(timezone.datetime(2024, 6, 1))
+    assert Post.objects.filter(pub_date__gt=anchor).exists(), (
+        "Убедитесь, что часть постов получает pub_date в будущем."
+    )
+    assert Category.objects.filter(is_published=False).exists()
+    assert Comment.objects.values("created_at").distinct().count() > 1, (
+        "Убедитесь, что у комментариев разные даты создания."
+    )
+    assert get_user_model().objects.first().check_password("password")
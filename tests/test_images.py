@@ -0,0 +1,145 @@
+import os
+import shutil
+import uuid
+from http import HTTPStatus
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import SIZE_FILE, evict_variants, get_variant
+
+
+@pytest.fixture
+def image_cache_dir(settings):
+    settings.IMAGE_CACHE_DIR = f"resized-{uuid.uuid4().hex}"
+    yield Path(settings.MEDIA_ROOT) / settings.IMAGE_CACHE_DIR
+    shutil.rmtree(
+        Path(settings.MEDIA_ROOT) / settings.IMAGE_CACHE_DIR,
+        ignore_errors=True
+    )
+
+
+@pytest.mark.django_db
+def test_image_meta_saved_on_upload(post_with_published_location):
+    post = post_with_published_location
+    assert post.image_meta == {
+        "width": 100,
+        "height": 100,
+        "size": post.image.size,
+        "format": "jpeg",
+    }, (
+        "Убедитесь, что при сохранении поста с изображением в `image_meta`"
+        " записываются его размеры, вес и формат."
+    )
+
+    post.image = None
+    post.save()
+    assert post.image_meta == {}
+
+
+@pytest.mark.django_db
+def test_backfill_image_meta(post_with_published_location, PostModel):
+    post = post_with_published_location
+    PostModel.objects.filter(pk=post.pk).update(image_meta={})
+    call_command("backfill_image_meta", "--workers=2", "--batch-size=1")
+    post.refresh_from_db()
+    assert post.image_meta["width"] == 100
+    assert post.image_meta["size"] == post.image.size
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("image_cache_dir")
+def test_post_image_preset(client, post_with_published_location, settings):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/image/thumb/"
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что уменьшенное изображение доступно по адресу `{url}`."
+    )
+    body = b"".join(response.streaming_content)
+    with Image.open(BytesIO(body)) as image:
+        assert image.format == "WEBP"
+        assert max(image.size) <= settings.IMAGE_PRESETS["thumb"]["size"][0]
+
+    response = client.get(f"/posts/{post.id}/image/unknown/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("image_cache_dir")
+def test_variant_cache_eviction(post_with_published_location, settings):
+    name = post_with_published_location.image.name
+    first = get_variant(name, "thumb")
+    second = get_variant(name, "card")
+    media_root = Path(settings.MEDIA_ROOT)
+    os.utime(media_root / first, (1000, 1000))
+    os.utime(media_root / second, (2000, 2000))
+    first_size = (media_root / first).stat().st_size
+    second_size = (media_root / second).stat().st_size
+    # Лимит, при котором после удаления одного варианта кэш укладывается
+    # в 90% лимита, а вместе оба варианта в него не помещаются
+    max_bytes = int(second_size / 0.9) + 1
+    assert first_size + second_size > max_bytes
+    assert evict_variants(max_bytes=max_bytes) == 1
+    assert not (media_root / first).exists(), (
+        "Убедитесь, что первым удаляется вариант, который дольше всех"
+        " не запрашивали."
+    )
+    assert (media_root / second).exists()
+
+
+@pytest.mark.django_db
+def test_variant_cache_size_tracked(
+    post_with_published_location, settings, image_cache_dir, monkeypatch
+):
+    name = post_with_published_location.image.name
+    thumb = image_cache_dir.parent / get_variant(name, "thumb")
+    size_file = image_cache_dir / SIZE_FILE
+    assert int(size_file.read_text()) == thumb.stat().st_size
+
+    scans = []
+    monkeypatch.setattr(
+        "blog.images.evict_variants", lambda: scans.append(True)
+    )
+    card = image_cache_dir.parent / get_variant(name, "card")
+    assert not scans, (
+        "Убедитесь, что каталог кэша не обходится на каждой записи,"
+        " пока учтённый размер не превышает лимит."
+    )
+    assert int(size_file.read_text()) == (
+        thumb.stat().st_size + card.stat().st_size
+    )
+    settings.IMAGE_CACHE_MAX_BYTES = 1
+    get_variant(name, "preview")
+    assert scans, "Убедитесь, что при превышении лимита кэш чистится."
+
+
+@pytest.mark.django_db
+def test_collect_orphan_media(
+    post_with_published_location, settings, tmp_path
+):
+    referenced = post_with_published_location.image.name
+    source = Path(settings.MEDIA_ROOT) / referenced
+    # Команда удаляет файлы: работаем с копией MEDIA_ROOT во временном
+    # каталоге, а не с изображениями разработчика
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / referenced).parent.mkdir(parents=True)
+    shutil.copy(source, tmp_path / referenced)
+    os.utime(tmp_path / referenced, (0, 0))
+    orphan = tmp_path / "post_images" / f"{uuid.uuid4().hex}.jpg"
+    orphan.write_bytes(b"orphan")
+    os.utime(orphan, (0, 0))
+    fresh = tmp_path / "post_images" / f"{uuid.uuid4().hex}.jpg"
+    fresh.write_bytes(b"fresh")
+    call_command(
+        "collect_orphan_media", "--action=delete", "--chunk-size=1",
+        stdout=StringIO()
+    )
+    assert not orphan.exists(), (
+        "Убедитесь, что файлы без ссылающихся на них постов удаляются."
+    )
+    assert fresh.exists()
+    assert (tmp_path / referenced).exists()
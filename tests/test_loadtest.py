@@ -0,0 +1,58 @@
+import random
+from http import HTTPStatus
+
+import pytest
+from mixer.backend.django import mixer
+
+from blog.models import Category
+from core.loadtest import WSGIClient, compare, percentile, sample, summarize
+
+
+def test_percentile_and_summary():
+    values = list(range(1, 101))
+    assert [percentile(values, p) for p in (50, 95, 99)] == [50, 95, 99]
+    records = [("blog:index", ms / 1000, 200) for ms in values]
+    records.append(("blog:post_detail", 0.5, 500))
+    summary = summarize(records, elapsed=10)
+    assert summary["blog:index"]["p95_ms"] == 95
+    assert summary["blog:index"]["rps"] == 10
+    assert summary["blog:post_detail"]["errors"] == 1
+    assert summary["total"]["requests"] == 101
+
+    slower = summarize(
+        [("blog:index", ms / 500, 200) for ms in values], elapsed=10
+    )
+    assert "blog:index" in compare(slower, summary, tolerance=0.2), (
+        "Убедитесь, что рост p95 сверх допуска считается регрессией."
+    )
+    assert not compare(summary, summary, tolerance=0.2)
+
+
+@pytest.mark.django_db
+def test_wsgi_client_keeps_session(user):
+    user.set_password("password")
+    user.save()
+    client = WSGIClient()
+    client.cookies["csrftoken"] = "a" * 32
+    status, _, _ = client.request("POST", "/auth/login/", {
+        "username": user.username,
+        "password": "password",
+        "csrfmiddlewaretoken": "a" * 32,
+    })
+    assert status == HTTPStatus.FOUND
+    status, _, _ = client.request("GET", "/edit_profile/")
+    assert status == HTTPStatus.OK, (
+        "Убедитесь, что WSGIClient сохраняет cookie сессии между запросами."
+    )
+
+
+@pytest.mark.django_db
+def test_sample_reproducible():
+    mixer.cycle(20).blend(Category)
+    slugs = Category.objects.values_list("slug", flat=True)
+    first = sample(slugs, 5, random.Random(1))
+    assert first == sample(slugs, 5, random.Random(1)), (
+        "Убедитесь, что выборка из базы зависит только от зерна."
+    )
+    assert len(set(first)) == 5
+    assert len(sample(slugs, 50, random.Random(1))) == 20
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+
+@pytest.mark.django_db
+def test_media_served_with_cache_headers(
+        client, post_with_published_location):
+    url = post_with_published_location.image.url
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что загруженное изображение доступно по адресу"
+        f" `{url}`."
+    )
+    body = b"".join(response.streaming_content)
+    assert len(body) == post_with_published_location.image.size
+    assert response.headers.get("ETag"), (
+        "Убедитесь, что media-файлы отдаются с заголовком ETag."
+    )
+    assert "max-age" in response.headers.get("Cache-Control", "")
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_media_range_request(client, post_with_published_location):
+    url = post_with_published_location.image.url
+    size = post_with_published_location.image.size
+    response = client.get(url, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert response.headers["Content-Range"] == f"bytes 10-19/{size}"
+    assert len(b"".join(response.streaming_content)) == 10
+
+    response = client.get(url, HTTP_RANGE=f"bytes={size}-")
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+@pytest.mark.django_db
+def test_media_accel_redirect(client, post_with_published_location):
+    name = post_with_published_location.image.name
+    with override_settings(MEDIA_SERVE_MODE="x-accel-redirect"):
+        response = client.get(post_with_published_location.image.url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["X-Accel-Redirect"].endswith(name)
+    assert not response.content
+
+
+@pytest.mark.django_db
+def test_media_path_traversal(client):
+    response = client.get("/media/..%2Fblogicum%2Fsettings.py")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_static_hashed_and_precompressed(tmp_path, rf):
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.core.management import call_command
+
+    from core.middleware import StaticFilesMiddleware
+
+    with override_settings(STATIC_ROOT=tmp_path):
+        call_command("collectstatic", interactive=False, verbosity=0)
+        css_name = staticfiles_storage.stored_name("css/bootstrap.min.css")
+        assert css_name != "css/bootstrap.min.css", (
+            "Убедитесь, что после collectstatic имена статических файлов"
+            " содержат хеш содержимого."
+        )
+        assert (tmp_path / f"{css_name}.gz").is_file()
+
+        middleware = StaticFilesMiddleware(lambda request: None)
+        request = rf.get(
+            f"/static/{css_name}", HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        response = middleware(request)
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["Content-Encoding"] in ("br", "gzip")
+        assert "immutable" in response.headers["Cache-Control"]
+        assert response.headers["Vary"] == "Accept-Encoding"
+        response.file_to_stream.close()
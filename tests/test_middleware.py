@@ -0,0 +1,111 @@
+import gzip
+from http import HTTPStatus
+
+import pytest
+from django.http import StreamingHttpResponse
+
+from core.compression import supported_encodings
+from core.middleware import CompressionMiddleware
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+def test_compressed_feed(client):
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["Content-Encoding"] == "gzip", (
+        "Убедитесь, что HTML-страницы сжимаются, если клиент это допускает."
+    )
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert b"<html" in gzip.decompress(response.content)
+
+    response = client.get("/", HTTP_ACCEPT_ENCODING="identity")
+    assert not response.has_header("Content-Encoding")
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+def test_compressed_with_secrets_padded(client, user_client):
+    response = client.get("/", HTTP_ACCEPT_ENCODING="br, gzip")
+    assert response.headers["Content-Encoding"] == supported_encodings()[0]
+
+    lengths = set()
+    for _ in range(5):
+        response = user_client.get("/", HTTP_ACCEPT_ENCODING="br, gzip")
+        assert response.headers["Content-Encoding"] == "gzip", (
+            "Убедитесь, что ответы с сессией сжимаются только gzip"
+            " со случайным дополнением длины (защита от BREACH)."
+        )
+        assert b"<html" in gzip.decompress(response.content)
+        lengths.add(len(response.content))
+    assert len(lengths) > 1, (
+        "Убедитесь, что длина сжатых ответов с секретами случайна."
+    )
+
+
+@pytest.mark.django_db
+def test_compressed_streaming_response(rf):
+    chunks = [b"<p>chunk</p>" * 50] * 3
+    middleware = CompressionMiddleware(
+        lambda request: StreamingHttpResponse(
+            iter(chunks), content_type="text/html"
+        )
+    )
+    response = middleware(rf.get("/", HTTP_ACCEPT_ENCODING="gzip"))
+    parts = list(response.streaming_content)
+    assert len(parts) > 1, (
+        "Убедитесь, что потоковые ответы сжимаются по частям."
+    )
+    assert gzip.decompress(b"".join(parts)) == b"".join(chunks)
+
+
+@pytest.mark.django_db
+def test_media_not_compressed(client, post_with_published_location):
+    response = client.get(
+        post_with_published_location.image.url, HTTP_ACCEPT_ENCODING="gzip"
+    )
+    assert not response.has_header("Content-Encoding")
+    response.close()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+def test_metrics_endpoint(client, settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    client.get("/")
+    response = client.get("/metrics/")
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что метрики доступны по адресу `/metrics/`."
+    )
+    text = response.content.decode()
+    assert (
+        'blogicum_requests_total{view="blog:index",method="GET",'
+        'status="200"}' in text
+    ), "Убедитесь, что метрики запросов размечены именем маршрута."
+    assert 'blogicum_db_queries_count{view="blog:index"}' in text
+    assert (
+        'blogicum_template_renders_total{template="includes/header.html",'
+        'parent="blog/index.html"}' in text
+    ), "Убедитесь, что метрики считают рендеры каждого include."
+    assert list(tmp_path.glob("*.json")), (
+        "Убедитесь, что метрики процесса сохраняются в METRICS_DIR."
+    )
+
+    settings.METRICS_ALLOWED_IPS = []
+    assert client.get("/metrics/").status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+def test_server_timing_for_staff(client, user_client, user, settings):
+    settings.SERVER_TIMING_SAMPLE_RATE = 0
+    assert not client.get("/").has_header("Server-Timing")
+
+    user.is_staff = True
+    user.save()
+    header = user_client.get("/").headers.get("Server-Timing", "")
+    for metric in ("db;dur=", "tpl;dur=", "cache;dur=", "total;dur="):
+        assert metric in header, (
+            "Убедитесь, что для персонала ответы страниц блога содержат"
+            " заголовок Server-Timing с разбивкой по БД, шаблонам и кэшу."
+        )
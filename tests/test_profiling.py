@@ -0,0 +1,86 @@
+import threading
+import time
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import resolve
+
+from core.models import Profile
+from core.profiling import ContinuousSampler, get_sampler
+
+
+@pytest.mark.django_db
+def test_profiling_is_staff_only(user_client, user):
+    response = user_client.get(f"/profile/{user.username}/?_profile=1")
+    assert not response.has_header("X-Profile-URL")
+    assert not Profile.objects.exists(), (
+        "Убедитесь, что профилирование доступно только персоналу."
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("many_posts_with_published_locations")
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_profiling_saves_profile(user_client, user, mode):
+    user.is_staff = True
+    user.is_superuser = True
+    user.save()
+    response = user_client.get(
+        f"/profile/{user.username}/", HTTP_X_PROFILE=mode
+    )
+    assert response.status_code == HTTPStatus.OK
+    profile = Profile.objects.get()
+    assert profile.mode == mode
+    assert profile.view == "blog:profile"
+    assert profile.queries == len(profile.sql) > 0, (
+        "Убедитесь, что в профиле сохраняются SQL-запросы с временем."
+    )
+    assert ["includes/post_card.html", "blog/profile.html"] in [
+        row[:2] for row in profile.templates
+    ], "Убедитесь, что в профиле сохраняется время каждого include."
+    if mode == "cprofile":
+        assert "profile_detail" in profile.call_tree, (
+            "Убедитесь, что в профиле сохраняется дерево вызовов."
+        )
+    page = user_client.get(response.headers["X-Profile-URL"])
+    assert page.status_code == HTTPStatus.OK, (
+        "Убедитесь, что профиль открывается в админке."
+    )
+
+
+def _busy_view(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.mark.django_db
+def test_continuous_sampler(client, rf, settings, tmp_path):
+    client.get("/")
+    assert get_sampler().is_alive() and not get_sampler().requests, (
+        "Убедитесь, что SamplingMiddleware запускает сэмплер и снимает"
+        " поток с учёта после ответа."
+    )
+
+    sampler = ContinuousSampler(0.001, 0.5, tmp_path, 60)
+    request = rf.get("/")
+    request.resolver_match = resolve("/")
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_view, args=(stop,))
+    worker.start()
+    sampler.requests[worker.ident] = request
+    sampler.start()
+    time.sleep(0.05)
+    stop.set()
+    worker.join()
+    sampler.stop()
+
+    settings.SAMPLING_DIR = tmp_path
+    out = StringIO()
+    call_command("collect_stacks", route=["blog:index"], stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines and all(line.startswith("blog:index;") for line in lines)
+    assert any("test_profiling:_busy_view" in line for line in lines), (
+        "Убедитесь, что сэмплер пишет свёрнутые стеки по маршрутам."
+    )
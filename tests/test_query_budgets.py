@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("posts_at_scale")
+@pytest.mark.parametrize("page", ["", "?page=2", "?page=3"])
+def test_feed_budgets(
+    assert_query_budget, user_client, user, published_category, page
+):
+    for url in (
+        f"/{page}",
+        f"/category/{published_category.slug}/{page}",
+        f"/profile/{user.username}/{page}",
+    ):
+        response = assert_query_budget(user_client, url)
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_post_budgets(
+    assert_query_budget, user, user_client, another_user_client,
+    posts_at_scale
+):
+    post = next(p for p in posts_at_scale if p.author == user)
+    for client in (user_client, another_user_client):
+        assert_query_budget(client, f"/posts/{post.id}/")
+    assert_query_budget(user_client, f"/posts/{post.id}/edit/")
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/comment/", "post", {"text": "Текст"}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    comment = post.comments.filter(author=user).first()
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/edit_comment/{comment.id}/",
+        "post", {"text": "Новый текст"}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/delete_comment/{comment.id}/", "post"
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    form = {
+        "title": "Заголовок", "text": "Текст", "is_published": True,
+        "pub_date": post.pub_date.strftime("%Y-%m-%d %H:%M"),
+        "category": post.category_id,
+    }
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/edit/", "post", form
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    response = assert_query_budget(
+        user_client, "/posts/create/", "post", form
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    response = assert_query_budget(
+        user_client, f"/posts/{post.id}/delete/", "post"
+    )
+    assert response.status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("posts_at_scale")
+def test_over_budget_request_logged(client, caplog, monkeypatch):
+    from blog.views import PostListView
+
+    monkeypatch.setattr(PostListView, "query_budget", 1)
+    with caplog.at_level("WARNING", logger="core.middleware"):
+        client.get("/")
+    assert any(
+        "бюджете 1" in record.getMessage() for record in caplog.records
+    ), (
+        "Убедитесь, что запросы сверх бюджета SQL пишутся в лог."
+    )
+
+
+@pytest.mark.django_db
+def test_memory_budgets(
+    assert_memory_budget, user_client, user, heavy_posts, published_category
+):
+    for url in (
+        "/",
+        f"/posts/{heavy_posts.id}/",
+        f"/posts/{heavy_posts.id}/comments/",
+        f"/profile/{user.username}/",
+        f"/category/{published_category.slug}/",
+    ):
+        response = assert_memory_budget(user_client, url)
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_memory_metrics(client, settings, tmp_path):
+    settings.MEMORY_SAMPLE_RATE = 1
+    settings.METRICS_DIR = tmp_path
+    client.get("/")
+    text = client.get("/metrics/").content.decode()
+    assert 'blogicum_request_peak_memory_bytes_count{view="blog:index"}' in (
+        text
+    ), "Убедитесь, что пик памяти запросов попадает в метрики."
@@ -0,0 +1,70 @@
+import json
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from core.slowlog import fingerprint, normalize_sql
+
+
+def test_normalize_sql():
+    first = normalize_sql(
+        "SELECT * FROM blog_post WHERE id IN (%s, %s, %s)"
+        " AND title = 'a''b' LIMIT 10"
+    )
+    second = normalize_sql(
+        "SELECT *  FROM blog_post WHERE id IN (%s) AND title = 'c' LIMIT 20"
+    )
+    assert first == second == (
+        "SELECT * FROM blog_post WHERE id IN (...) AND title = ? LIMIT ?"
+    ), "Литералы и списки IN не нормализуются в отпечатке SQL."
+    assert fingerprint(first) == fingerprint(second)
+
+
+@pytest.fixture
+def slow_records(settings):
+    settings.SLOW_QUERY_THRESHOLD = 1e-9
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("core.slowlog")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+@pytest.mark.django_db
+def test_slow_query_logged(client, post_with_published_location, slow_records):
+    client.get(f"/posts/{post_with_published_location.id}/")
+    entries = [json.loads(record.getMessage()) for record in slow_records]
+    post_queries = [
+        entry for entry in entries if "FROM \"blog_post\"" in entry["sql"]
+    ]
+    assert post_queries, "Медленные запросы не попадают в журнал."
+    entry = post_queries[0]
+    assert entry["view"] == "blog:post_detail"
+    assert entry["plan"], "В журнале нет плана EXPLAIN QUERY PLAN."
+    assert any("blog/views.py" in frame for frame in entry["origin"]), (
+        "В журнале нет места вызова запроса в коде проекта."
+    )
+    assert str(post_with_published_location.id) not in entry["sql"]
+
+
+@pytest.mark.django_db
+def test_slow_queries_command(
+    client, post_with_published_location, slow_records, tmp_path
+):
+    client.get(f"/posts/{post_with_published_location.id}/")
+    client.get(f"/posts/{post_with_published_location.id}/")
+    log = tmp_path / "slow.log"
+    log.write_text(
+        "".join(record.getMessage() + "\n" for record in slow_records),
+        encoding="utf-8",
+    )
+    out = StringIO()
+    call_command("slow_queries", file=log, sort="count", top=3, stdout=out)
+    output = out.getvalue()
+    assert "2 раз" in output and "план:" in output, (
+        "Команда slow_queries не сводит журнал по отпечаткам."
+    )
@@ -0,0 +1,126 @@
+import json
+import logging
+import sqlite3
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from blog.models import Comment
+from core.loadtest import switch_database
+from core.traffic import replay
+
+
+@pytest.fixture
+def captured(settings):
+    settings.TRAFFIC_CAPTURE_SAMPLE_RATE = 1
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("core.traffic")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+@pytest.fixture
+def database_copy(tmp_path):
+    """
+    Снимает файл-копию тестовой базы для команд с параметром --db.
+
+    Команда переключает соединение default на копию; после теста оно
+    возвращается к тестовой базе в памяти.
+    """
+    name = connection.settings_dict["NAME"]
+    # База в памяти живёт, пока к ней открыто хотя бы одно соединение
+    keeper = sqlite3.connect(name, uri=True)
+
+    def make_copy():
+        copy = tmp_path / "copy.sqlite3"
+        target = sqlite3.connect(copy)
+        connection.ensure_connection()
+        connection.connection.backup(target)
+        target.close()
+        return copy
+
+    yield make_copy
+    switch_database(name)
+    connection.ensure_connection()
+    keeper.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_capture_and_replay(
+    captured, client, user_client, user, post_with_published_location,
+    comment, tmp_path, database_copy
+):
+    post = post_with_published_location
+    client.get(f"/profile/{user.username}/?page=1&utm=mail")
+    user_client.get(f"/profile/{user.username}/")
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Секретный текст"}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    entries = [json.loads(record.getMessage()) for record in captured]
+    log = "\n".join(record.getMessage() for record in captured)
+    assert user.username not in log and "Секретный" not in log, (
+        "Убедитесь, что журнал трафика обезличен."
+    )
+    assert entries[0]["view"] == "blog:profile"
+    assert entries[0]["page"] == "1"
+    assert (entries[0]["auth"], entries[1]["auth"]) == ("anonymous", "user")
+    assert entries[1]["own"]
+
+    path = tmp_path / "traffic.log"
+    path.write_text(log + "\n", encoding="utf-8")
+    comments = Comment.objects.count()
+    copy = database_copy()
+    call_command(
+        "replay_traffic", log=path, db=copy, speed=0, concurrency=1,
+        output=tmp_path / "replay.json", stdout=StringIO(),
+    )
+    result = json.loads((tmp_path / "replay.json").read_text())
+    assert result["results"]["replayed"]["blog:profile"]["requests"] == 2
+    assert result["results"]["replayed"]["blog:profile"]["errors"] == 0
+    with sqlite3.connect(copy) as target:
+        replayed, = target.execute(
+            "SELECT COUNT(*) FROM blog_comment"
+        ).fetchone()
+    target.close()
+    assert replayed == comments + 1, (
+        "Убедитесь, что replay_traffic воспроизводит отправку комментариев"
+        " в копии базы."
+    )
+
+
+def test_replay_requires_copy(settings, tmp_path):
+    path = tmp_path / "traffic.log"
+    path.write_text("{}\n", encoding="utf-8")
+    with pytest.raises(CommandError):
+        call_command("replay_traffic", log=path)
+    with pytest.raises(CommandError, match="настроенную базу"):
+        call_command(
+            "replay_traffic", log=path,
+            db=settings.DATABASES["default"]["NAME"],
+        )
+
+
+@pytest.mark.django_db
+def test_replay_counts_failures(captured):
+    def send(entry):
+        if entry["view"] == "blog:index":
+            raise ValueError("сбой")
+        return None if entry["view"] == "skip" else HTTPStatus.OK
+
+    entries = [
+        {"view": view, "time": time}
+        for time, view in enumerate(("blog:index", "blog:profile", "skip"))
+    ]
+    records = replay(entries, send, speed=0, concurrency=2)
+    assert sorted((view, status) for view, _, status in records) == [
+        ("blog:index", HTTPStatus.INTERNAL_SERVER_ERROR),
+        ("blog:profile", HTTPStatus.OK),
+    ], "Убедитесь, что исключения при воспроизведении считаются ошибками."
+    assert any(record.exc_info for record in captured)